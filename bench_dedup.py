@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+import datetime as dt
+import random
+import sys
+import time
+
+from puller_forwarder import Calendar, EventCache, SummaryIndex
+
+WORDS = [
+    "jazz",
+    "night",
+    "concert",
+    "standup",
+    "comedy",
+    "open",
+    "mic",
+    "board",
+    "games",
+    "quiz",
+    "poker",
+    "lecture",
+    "workshop",
+    "meetup",
+    "techno",
+    "party",
+    "exhibition",
+    "opening",
+    "film",
+    "screening",
+    "book",
+    "club",
+    "language",
+    "exchange",
+    "hike",
+    "airsoft",
+    "tournament",
+    "yoga",
+    "brunch",
+    "market",
+    "tasting",
+    "wine",
+    "beer",
+    "craft",
+    "theatre",
+    "premiere",
+    "kids",
+    "festival",
+    "dance",
+    "salsa",
+]
+PLACES = (
+    "Dorcol Platz",
+    "KC Grad",
+    "Drugstore",
+    "Zappa Barka",
+    "Kombinat",
+    "Noda Space",
+    "Xecut",
+    "Ada Ciganlija",
+    "Kalemegdan",
+    "Mikser House",
+)
+SIZES = (10, 100, 1000)
+QUERIES = 200
+DAY = dt.date(2025, 1, 1)
+
+
+def make_summary(rnd: random.Random) -> str:
+    name = "".join(rnd.choices("abcdefghijklmnopqrstuvwxyz", k=rnd.randint(4, 9)))
+    title = " ".join([*rnd.choices(WORDS, k=rnd.randint(1, 4)), name])
+    return Calendar.normalize_summary(f"{title} @ {rnd.choice(PLACES)}")
+
+
+def mutate(rnd: random.Random, summary: str) -> str:
+    chars = list(summary)
+    for _ in range(rnd.randint(1, max(1, len(chars) // 5))):
+        pos = rnd.randrange(len(chars))
+        chars[pos] = rnd.choice("abcdefghijklmnopqrstuvwxyz ")
+    return Calendar.normalize_summary("".join(chars))
+
+
+def scan(existing: set[str], summary: str) -> bool:
+    return any(Calendar.is_similar(summary, s) for s in existing)
+
+
+# Each path answers the queries in order and, like publishing, adds every
+# summary it found no duplicate for, so all three see the same calendar.
+
+
+def run_scan(existing: set[str], queries: list[str]) -> list[bool]:
+    existing = set(existing)
+    found = []
+    for q in queries:
+        found.append(scan(existing, q))
+        if not found[-1]:
+            existing.add(q)
+    return found
+
+
+def run_rebuild(existing: set[str], queries: list[str]) -> list[bool]:
+    # An index built from the date's summaries for every message.
+    existing = set(existing)
+    found = []
+    for q in queries:
+        found.append(SummaryIndex(existing).find(q) is not None)
+        if not found[-1]:
+            existing.add(q)
+    return found
+
+
+def run_cached(existing: set[str], queries: list[str]) -> list[bool]:
+    # The date's index is built on first use and kept up to date, as in
+    # production; the build is part of the timing.
+    cache = EventCache()
+    for i, summary in enumerate(existing):
+        cache.put(f"e{i}", [DAY], summary)
+    found = []
+    for i, q in enumerate(queries):
+        found.append(cache.index(DAY).find(q) is not None)
+        if not found[-1]:
+            cache.put(f"q{i}", [DAY], q)
+    return found
+
+
+def timed(run, existing: set[str], queries: list[str]) -> tuple[list[bool], float]:
+    start = time.perf_counter()
+    found = run(existing, queries)
+    return found, time.perf_counter() - start
+
+
+def bench(size: int, seed: int = 42):
+    rnd = random.Random(seed)
+    existing = {make_summary(rnd) for _ in range(size)}
+    pool = sorted(existing)
+    queries = [
+        mutate(rnd, rnd.choice(pool)) if i % 2 else make_summary(rnd)
+        for i in range(QUERIES)
+    ]
+
+    expected, scan_time = timed(run_scan, existing, queries)
+    rebuilt, rebuild_time = timed(run_rebuild, existing, queries)
+    cached, cached_time = timed(run_cached, existing, queries)
+
+    mismatches = sum(a != b for a, b in zip(expected, rebuilt, strict=True))
+    mismatches += sum(a != b for a, b in zip(expected, cached, strict=True))
+    print(
+        f"{size:>5} events/date | scan {scan_time / QUERIES * 1e3:8.3f} ms/query"
+        f" | rebuilt index {rebuild_time / QUERIES * 1e3:7.3f} ms/query"
+        f" ({scan_time / rebuild_time:5.1f}x)"
+        f" | kept index {cached_time / QUERIES * 1e3:7.3f} ms/query"
+        f" ({scan_time / cached_time:5.1f}x)"
+        f" | dups {sum(expected)}/{QUERIES} | mismatches {mismatches}"
+    )
+    return mismatches
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(a) for a in sys.argv[1:]) or SIZES
+    failed = sum(bench(size) for size in sizes)
+    sys.exit(1 if failed else 0)
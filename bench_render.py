@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Compare the chained sticker scripts with the fused svg_render path.
+
+Chained: svg_convert/svg_convert2 -> *.new.png -> png_resize -> png_filter,
+with a file written and re-read between steps. Fused: svg_render.render and a
+single save. Both write into a temporary directory; sources are left alone.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageChops, ImageStat
+
+import png_build
+import png_filter
+import png_resize
+import svg_render
+
+
+def chained(infile: str, backend: str, out_dir: str) -> str:
+    if backend == "cairosvg":
+        import svg_convert as convert_script
+    else:
+        import svg_convert2 as convert_script
+
+    name = os.path.splitext(os.path.basename(infile))[0]
+    rendered = os.path.join(out_dir, name + ".new.png")
+    with open(rendered, "wb") as out:
+        out.write(convert_script.convert(infile))
+
+    resized = os.path.join(out_dir, name + ".new.new.png")
+    with Image.open(rendered) as im:
+        png_resize.resize(im).save(resized, "PNG")
+
+    filtered = os.path.join(out_dir, name + ".new.newf.png")
+    with Image.open(resized) as im:
+        png_filter.sharpen(im).save(filtered, "PNG")
+    return filtered
+
+
+def fused(infile: str, backend: str, out_dir: str) -> str:
+    name = os.path.splitext(os.path.basename(infile))[0]
+    path = os.path.join(out_dir, name + ".fused.png")
+    svg_render.render(infile, backend).save(path, "PNG")
+    return path
+
+
+def difference(a: str, b: str) -> float:
+    """Mean absolute per-channel difference, 0-255."""
+    with Image.open(a) as im_a, Image.open(b) as im_b:
+        im_a, im_b = im_a.convert("RGBA"), im_b.convert("RGBA")
+        if im_a.size != im_b.size:
+            im_b = im_b.resize(im_a.size)
+        return statistics.fmean(ImageStat.Stat(ImageChops.difference(im_a, im_b)).mean)
+
+
+def bench(files: list[str], backend: str) -> int:
+    times: dict[str, list[float]] = {"chained": [], "fused": []}
+    diffs = []
+    failed = 0
+    with tempfile.TemporaryDirectory() as out_dir:
+        for infile in files:
+            outputs = {}
+            try:
+                for name, run in (("chained", chained), ("fused", fused)):
+                    start = time.perf_counter()
+                    outputs[name] = run(infile, backend, out_dir)
+                    times[name].append(time.perf_counter() - start)
+                diffs.append(difference(outputs["chained"], outputs["fused"]))
+            except Exception as e:
+                print(infile, e)
+                failed += 1
+
+    if not diffs:
+        print(f"{backend:<9} no files rendered")
+        return failed
+    chained_ms = statistics.fmean(times["chained"]) * 1e3
+    fused_ms = statistics.fmean(times["fused"]) * 1e3
+    print(
+        f"{backend:<9} {len(diffs):>4} files | chained {chained_ms:8.1f} ms/file"
+        f" | fused {fused_ms:8.1f} ms/file | {chained_ms / fused_ms:5.2f}x"
+        f" | mean pixel diff {statistics.fmean(diffs):5.2f}"
+    )
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="SVG files or directories")
+    parser.add_argument(
+        "--backend", action="append", choices=svg_render.BACKENDS, default=[]
+    )
+    args = parser.parse_args()
+
+    files = [f for f in png_build.find_inputs(args.paths) if f.endswith(".svg")]
+    failed = sum(bench(files, b) for b in args.backend or svg_render.BACKENDS)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+"""Replay recorded messages through setup_bot against local stand-ins.
+
+Corpus is JSONL, one message per line:
+    {"chat": "afisha_rs", "id": 1, "date": "2026-10-17T10:00:00+00:00",
+     "text": "...", "events": [{"date": "2026-10-20", "summary": "..."}]}
+`events` is what the fake LLM answers for that text (defaults to none).
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import itertools
+import json
+import random
+import re
+import statistics
+import time
+import typing as t
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+import puller_forwarder as pf
+
+timings: dict[str, list[float]] = defaultdict(list)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class TimedStage(pf.Stage):
+    def __init__(self, name, worker, *args, **kwargs):
+        async def timed(item):
+            start = time.perf_counter()
+            try:
+                await worker(item)
+            finally:
+                timings[f"stage.{name}"].append(time.perf_counter() - start)
+
+        super().__init__(name, timed, *args, **kwargs)
+
+
+class FakeLLMServer:
+    """OpenAI-compatible /chat/completions with canned answers."""
+
+    def __init__(self, answers: dict[str, list[dict]], latency: float, errors: float):
+        self.answers = answers
+        # Compacted prompts differ from the recorded text; their first line
+        # survives compaction, so it identifies the message.
+        self.by_first_line = {
+            pf.PromptCompactor.clean(text.split("\n", 1)[0]): events
+            for text, events in answers.items()
+        }
+        self.latency = latency
+        self.errors = errors
+        self.calls = 0
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    def lookup(self, text: str) -> list[dict]:
+        if text in self.answers:
+            return self.answers[text]
+        return self.by_first_line.get(text.split("\n", 1)[0], [])
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        payload = await request.json()
+        await asyncio.sleep(random.expovariate(1 / self.latency) if self.latency else 0)
+        if random.random() < self.errors:
+            return web.json_response({"error": "overloaded"}, status=503)
+
+        text = payload["messages"][-1]["content"]
+        if payload["messages"][0]["content"].endswith(pf.BATCH_PROMPT_SUFFIX):
+            parts = re.split(r"^### (\d+)\n", text, flags=re.M)[1:]
+            messages = [
+                {"id": i, "events": self.lookup(part.strip())}
+                for i, part in zip(parts[::2], parts[1::2], strict=True)
+            ]
+            content = json.dumps({"messages": messages})
+        else:
+            content = json.dumps({"events": self.lookup(text)})
+        prompt = sum(len(m["content"]) for m in payload["messages"])
+        # Rough 4 characters per token, enough to compare runs.
+        usage = {"prompt_tokens": prompt // 4, "completion_tokens": len(content) // 4}
+        return web.json_response(
+            {"choices": [{"message": {"content": content}}], "usage": usage}
+        )
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/chat/completions", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class FakeCalendarStore:
+    def __init__(self):
+        self.items: dict[str, dict] = {}
+        self._ids = itertools.count()
+
+    def handle(self, method: str, path: str, params: dict, body: dict | None) -> dict:
+        if method == "POST":
+            event_id = body.get("id") or str(next(self._ids))
+            item = {**body, "id": event_id, "htmlLink": f"cal/{event_id}"}
+            self.items[event_id] = item
+            return item
+        if path != "events":
+            return self.items[path.removeprefix("events/")]
+
+        if "syncToken" in params:
+            return {"items": [], "nextSyncToken": "sync"}
+        lo = params["timeMin"][:10]
+        hi = params["timeMax"][:10]
+        items = [i for i in self.items.values() if lo <= i["start"]["date"] < hi]
+        return {"items": items, "nextSyncToken": "sync"}
+
+
+class FakeCalendar(pf.Calendar):
+    def __init__(self, latency: float):
+        self._cal_id = "bench"
+        self._store = FakeCalendarStore()
+        self._rate_limiters = {
+            op: pf.AsyncRateLimiter(rate, burst, name=f"calendar:{op}")
+            for op, (rate, burst) in self.RATE_LIMITS.items()
+        }
+        self._cache = pf.EventCache()
+        self._inflight = {}
+        self._latency = latency
+
+    async def close(self):
+        pass
+
+    async def _send(self, method, path, params=None, body=None):
+        await asyncio.sleep(self._latency)
+        result = self._store.handle(method, path, params or {}, body)
+        return 200, {}, json.dumps(result).encode()
+
+    async def _send_batch(self, calls):
+        await asyncio.sleep(self._latency)
+        return {}, [
+            (200, json.dumps(self._store.handle(m, p, q or {}, b)))
+            for m, p, q, b in calls
+        ]
+
+
+class FakeEntity:
+    def __init__(self, name: str):
+        self.username = name
+        self.title = name
+
+
+class FakeMessage:
+    def __init__(self, tg: "FakeTelegram", record: dict):
+        self._tg = tg
+        self.chat_id = hash(record.get("chat", "")) & 0xFFFFFFF
+        self.id = int(record["id"])
+        self.message = record["text"]
+        self.date = (
+            dt.datetime.fromisoformat(record["date"]) if "date" in record else None
+        )
+        self._sender = FakeEntity(record.get("chat", "bench"))
+
+    async def get_sender(self):
+        return self._sender
+
+    async def forward_to(self, entity):
+        start = time.perf_counter()
+        await asyncio.sleep(self._tg.forward_latency)
+        timings["forward"].append(time.perf_counter() - start)
+        return _Forwarded(next(self._tg.ids))
+
+
+class _Forwarded:
+    def __init__(self, msg_id: int):
+        self.id = msg_id
+
+
+class FakeTelegram:
+    def __init__(self, forward_latency: float):
+        self.forward_latency = forward_latency
+        self.ids = itertools.count(1)
+        self.handlers: list[t.Callable] = []
+        self.disconnected = asyncio.Event()
+
+    async def get_entity(self, url: str):
+        return FakeEntity(url.rsplit("/", 1)[-1])
+
+    def on(self, _event):
+        def register(handler):
+            self.handlers.append(handler)
+            return handler
+
+        return register
+
+    def remove_event_handler(self, handler):
+        self.handlers.remove(handler)
+
+    async def run_until_disconnected(self):
+        await self.disconnected.wait()
+
+
+class _Event:
+    def __init__(self, message: FakeMessage):
+        self.message = message
+
+
+class RecordingCheckpoints(pf.Checkpoints):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.started: dict[tuple[int, int], float] = {}
+        self.outcomes: Counter[str] = Counter()
+
+    def record(self, chat_id: int, msg_id: int, outcome: str):
+        super().record(chat_id, msg_id, outcome)
+        start = self.started.pop((chat_id, msg_id), None)
+        if start is not None:
+            timings["end_to_end"].append(time.perf_counter() - start)
+        self.outcomes[outcome] += 1
+
+
+def load_corpus(path: str | None, synthetic: int) -> list[dict]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    rnd = random.Random(1)
+    today = dt.date.today()
+    corpus = []
+    for i in range(synthetic):
+        day = today + dt.timedelta(days=rnd.randint(0, 30))
+        has_event = rnd.random() < 0.4
+        chat = rnd.randint(1, 30)
+        text = f"Message {i}: " + (
+            f"jazz night #{rnd.randint(1, 50)} on {day:%d.%m} at 20:00"
+            if has_event
+            else "news without anything to attend"
+        )
+        # What real channel posts carry around the content.
+        text += (
+            f"\n\n🎷🎷🎷  Tickets:   https://tickets.example.com/e/{i}?utm_source=tg"
+            f"\n#jazz #belgrade #events\n\nSubscribe to @channel{chat} 🔔🔔"
+            f"\nAds and collaborations: @channel{chat}_ads, https://t.me/channel{chat}"
+        )
+        corpus.append(
+            {
+                "chat": f"channel{chat}",
+                "id": i + 1,
+                "text": text,
+                "events": (
+                    [
+                        {
+                            "date": day.isoformat(),
+                            "summary": text[text.index(":") + 2 : text.index("\n")],
+                        }
+                    ]
+                    if has_event
+                    else []
+                ),
+            }
+        )
+    return corpus
+
+
+async def run(args: argparse.Namespace):
+    corpus = load_corpus(args.corpus, args.synthetic)
+    server = FakeLLMServer(
+        {r["text"]: r.get("events", []) for r in corpus},
+        latency=args.llm_latency,
+        errors=args.llm_errors,
+    )
+    await server.start()
+
+    pf.Stage = TimedStage  # type: ignore[misc]
+    base_llm = pf.OpenAICompatibleLLM(None, rate=args.llm_rate, burst=args.llm_burst)
+    base_llm.BASE_URL = server.url
+    llm: pf.OpenAICompatibleLLM | pf.BatchingLLM = base_llm
+    compactor = pf.PromptCompactor(args.prompt_max_chars) if args.compact else None
+    extract_config = {**pf.PIPELINE_STAGES["extract"], "overflow": "block"}
+    if args.batch_size > 1:
+        llm = pf.BatchingLLM(llm, args.batch_size, max_wait=args.batch_wait)
+        extract_config["workers"] = max(extract_config["workers"], args.batch_size)
+    calendar = FakeCalendar(args.calendar_latency)
+    tg = FakeTelegram(args.forward_latency)
+    checkpoints = RecordingCheckpoints()
+
+    async def timed_complete(user_prompt, sys_prompt=None, _orig=llm.complete):
+        start = time.perf_counter()
+        try:
+            return await _orig(user_prompt, sys_prompt)
+        finally:
+            timings["llm.complete"].append(time.perf_counter() - start)
+
+    llm.complete = timed_complete  # type: ignore[method-assign]
+
+    bot = asyncio.create_task(
+        pf.setup_bot(
+            t.cast(t.Any, tg),
+            llm,
+            calendar,
+            dst="https://t.me/bench_dst",
+            src=("https://t.me/bench_src",),
+            stages={"extract": extract_config},
+            prefilter=pf.TemporalPrefilter(args.prefilter),
+            checkpoints=checkpoints,
+            compactor=compactor,
+        )
+    )
+    while not tg.handlers:
+        await asyncio.sleep(0.01)
+
+    messages = [FakeMessage(tg, r) for r in corpus]
+    expected = {(m.chat_id, m.id) for m in messages if m.message.strip()}
+    start = time.perf_counter()
+    for message in messages:
+        checkpoints.started[(message.chat_id, message.id)] = time.perf_counter()
+        await tg.handlers[0](_Event(message))
+        if args.arrival_rate:
+            await asyncio.sleep(1 / args.arrival_rate)
+
+    deadline = time.perf_counter() + args.timeout
+    while sum(checkpoints.outcomes.values()) < len(expected):
+        if time.perf_counter() > deadline:
+            print("Timed out waiting for the pipeline to finish")
+            break
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    tg.disconnected.set()
+    await bot
+    await llm.close()
+    await server.stop()
+
+    done = sum(checkpoints.outcomes.values())
+    print(f"messages: {done}/{len(expected)} in {elapsed:.2f}s")
+    print(f"throughput: {done / elapsed:.2f} msg/s")
+    print(f"llm calls/message: {server.calls / max(done, 1):.2f}")
+    print(f"outcomes: {dict(checkpoints.outcomes)}")
+    usage = base_llm.usage
+    counted = usage["requests"] - usage["requests_without_usage"]
+    if compactor:
+        saved = 1 - compactor.chars_out / max(compactor.chars_in, 1)
+        print(
+            f"message chars: {compactor.chars_in} -> {compactor.chars_out}"
+            f" ({saved:.0%} saved, {compactor.footer_lines} footer lines)"
+        )
+    print(
+        f"llm prompt chars: {usage['prompt_chars']}, tokens: {usage['prompt_tokens']}"
+        f" in / {usage['completion_tokens']} out"
+        f" ({usage['prompt_tokens'] / max(counted, 1):.0f} per request)"
+    )
+    print(f"{'stage':<16}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, samples in sorted(timings.items()):
+        row = [statistics.fmean(samples)] + [
+            percentile(samples, q) for q in (0.5, 0.95, 0.99)
+        ]
+        cells = "".join(f"{v * 1e3:>8.1f}ms" for v in row)
+        print(f"{name:<16}{len(samples):>6}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", nargs="?", help="JSONL file of recorded messages")
+    parser.add_argument("--synthetic", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-errors", type=float, default=0.0)
+    parser.add_argument("--llm-rate", type=float, default=1.0)
+    parser.add_argument("--llm-burst", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--batch-wait", type=float, default=0.5)
+    parser.add_argument("--calendar-latency", type=float, default=0.1)
+    parser.add_argument("--forward-latency", type=float, default=0.1)
+    parser.add_argument("--arrival-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--prefilter", default="shadow", choices=pf.TemporalPrefilter.MODES
+    )
+    parser.add_argument("--no-compact", dest="compact", action="store_false")
+    parser.add_argument("--prompt-max-chars", type=int, default=1500)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""Index an emoji assets tree: file path -> glyph, keywords, variant, skin tone.
+
+The tree looks like `<root>/<Emoji>/metadata.json` plus image files under
+`<Emoji>/<Variant>/` or, for emoji with skin tones, `<Emoji>/<Tone>/<Variant>/`.
+metadata.json is parsed only when its mtime changes and a variant directory
+is listed only when its own mtime changes, so refreshing the index of an
+untouched tree is a handful of stat calls per emoji.
+"""
+
+import argparse
+import json
+import os
+import typing as t
+
+VARIANTS = ("3D", "Color", "Flat", "High Contrast")
+SKIN_TONES = ("Default", "Light", "Medium-Light", "Medium", "Medium-Dark", "Dark")
+
+
+class Sticker(t.NamedTuple):
+    path: str
+    glyph: str
+    keywords: tuple[str, ...]
+    variant: str
+    skin_tone: str | None
+
+
+def parse_skin_tone(value: str) -> str | None:
+    """argparse type: a tone name, or "none" for emoji that have no tones."""
+    if value.lower() == "none":
+        return None
+    if value not in SKIN_TONES:
+        raise argparse.ArgumentTypeError(f"unknown skin tone: {value}")
+    return value
+
+
+class EmojiIndex:
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self._path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        if data.get("version") != self.VERSION:
+            data = {"version": self.VERSION, "emoji": {}}
+        # Absolute emoji dir -> metadata fields and {variant dir: mtime, files}.
+        self._emoji: dict[str, dict] = data["emoji"]
+        self._stickers: dict[str, Sticker] | None = None
+        self.parsed = self.listed = 0
+
+    def save(self):
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            data = {"version": self.VERSION, "emoji": self._emoji}
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self._path)
+
+    def _leaf_dirs(self, emoji_dir: str) -> list[tuple[str, str, str | None]]:
+        """(relative dir, variant, skin tone) for every variant directory."""
+        leaves = []
+        for entry in os.scandir(emoji_dir):
+            if not entry.is_dir():
+                continue
+            if entry.name in VARIANTS:
+                leaves.append((entry.name, entry.name, None))
+            elif entry.name in SKIN_TONES:
+                for sub in os.scandir(entry.path):
+                    if sub.is_dir() and sub.name in VARIANTS:
+                        rel = os.path.join(entry.name, sub.name)
+                        leaves.append((rel, sub.name, entry.name))
+        return leaves
+
+    def _update_emoji(self, emoji_dir: str) -> bool:
+        meta_path = os.path.join(emoji_dir, "metadata.json")
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except FileNotFoundError:
+            self._emoji.pop(emoji_dir, None)
+            return False
+
+        record = self._emoji.get(emoji_dir)
+        if record is None or record["mtime"] != mtime:
+            try:
+                with open(meta_path, "rb") as f:
+                    meta = json.load(f)
+                glyph = meta["glyph"]
+            except Exception as e:
+                print(meta_path, e)
+                self._emoji.pop(emoji_dir, None)
+                return False
+            record = {
+                "mtime": mtime,
+                "glyph": glyph,
+                "keywords": meta.get("keywords", []),
+                "dirs": record["dirs"] if record else {},
+            }
+            self.parsed += 1
+
+        dirs = {}
+        for rel, variant, skin_tone in self._leaf_dirs(emoji_dir):
+            dir_mtime = os.stat(os.path.join(emoji_dir, rel)).st_mtime_ns
+            cached = record["dirs"].get(rel)
+            if cached is None or cached["mtime"] != dir_mtime:
+                files = sorted(
+                    e.name
+                    for e in os.scandir(os.path.join(emoji_dir, rel))
+                    if e.is_file()
+                )
+                cached = {"mtime": dir_mtime, "files": files}
+                self.listed += 1
+            dirs[rel] = {**cached, "variant": variant, "skin_tone": skin_tone}
+        record["dirs"] = dirs
+        self._emoji[emoji_dir] = record
+        self._stickers = None
+        return True
+
+    def update(self, root: str):
+        """Refresh `root`, either one emoji dir or a directory of them."""
+        root = os.path.abspath(root)
+        if os.path.isfile(os.path.join(root, "metadata.json")):
+            self._update_emoji(root)
+            return
+
+        seen = set()
+        for entry in sorted(os.scandir(root), key=lambda e: e.name):
+            if entry.is_dir() and self._update_emoji(entry.path):
+                seen.add(entry.path)
+        prefix = root + os.sep
+        for emoji_dir in [d for d in self._emoji if d.startswith(prefix)]:
+            if emoji_dir not in seen:
+                del self._emoji[emoji_dir]
+                self._stickers = None
+
+    def _all(self) -> dict[str, Sticker]:
+        if self._stickers is None:
+            self._stickers = {}
+            for emoji_dir, record in self._emoji.items():
+                keywords = tuple(record["keywords"])
+                for rel, leaf in record["dirs"].items():
+                    for name in leaf["files"]:
+                        path = os.path.join(emoji_dir, rel, name)
+                        self._stickers[path] = Sticker(
+                            path,
+                            record["glyph"],
+                            keywords,
+                            leaf["variant"],
+                            leaf["skin_tone"],
+                        )
+        return self._stickers
+
+    def locate(self, path: str) -> Sticker | None:
+        """Look up one file, refreshing the emoji dir it belongs to first."""
+        path = os.path.abspath(path)
+        parent = os.path.dirname(os.path.dirname(path))
+        for emoji_dir in (parent, os.path.dirname(parent)):
+            if os.path.isfile(os.path.join(emoji_dir, "metadata.json")):
+                self._update_emoji(emoji_dir)
+                break
+        return self._all().get(path)
+
+    def select(
+        self,
+        under: str | None = None,
+        variants: t.Collection[str] | None = None,
+        skin_tones: t.Collection[str | None] | None = None,
+        suffixes: tuple[str, ...] | None = None,
+    ) -> list[Sticker]:
+        prefix = os.path.abspath(under) + os.sep if under else ""
+        return sorted(
+            s
+            for s in self._all().values()
+            if s.path.startswith(prefix)
+            and (variants is None or s.variant in variants)
+            and (skin_tones is None or s.skin_tone in skin_tones)
+            and (suffixes is None or s.path.endswith(suffixes))
+        )
+
+    def resolve(
+        self,
+        paths: list[str],
+        variants: t.Collection[str] | None = None,
+        skin_tones: t.Collection[str | None] | None = None,
+        suffixes: tuple[str, ...] | None = None,
+    ) -> list[Sticker]:
+        """Stickers for a CLI path list: directories are searched, files kept
+        in the given order. Both are narrowed by the variant filters."""
+        found = []
+        for path in paths:
+            if os.path.isdir(path):
+                self.update(path)
+                found += self.select(path, variants, skin_tones, suffixes)
+                continue
+            sticker = self.locate(path)
+            if sticker is None:
+                print(path, "not under an emoji dir with metadata.json")
+            elif (variants is None or sticker.variant in variants) and (
+                skin_tones is None or sticker.skin_tone in skin_tones
+            ):
+                found.append(sticker)
+        return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("roots", nargs="+", help="assets trees or emoji dirs")
+    parser.add_argument("--index", default=".emoji_index.json")
+    parser.add_argument("--variant", action="append", choices=VARIANTS)
+    parser.add_argument("--skin-tone", action="append", type=parse_skin_tone)
+    args = parser.parse_args()
+
+    index = EmojiIndex(args.index)
+    for root in args.roots:
+        index.update(root)
+    index.save()
+    for sticker in index.resolve(args.roots, args.variant, args.skin_tone):
+        tone = sticker.skin_tone or "-"
+        print(f"{sticker.glyph}\t{sticker.variant}\t{tone}\t{sticker.path}")
+    print(f"parsed {index.parsed} metadata files, listed {index.listed} dirs")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""Render, resize and filter sticker images in parallel, skipping unchanged ones.
+
+Inputs are SVG or PNG files, or directories searched for them. SVGs are drawn
+at the target size by svg_render, PNGs go through png_resize, then both through
+png_filter in a worker process, and png_encode writes the result next to the
+source as `<name>.new.png` within the byte budget. A manifest of source hashes
+lets the next run skip inputs whose content and options haven't changed.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import typing as t
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+import emoji_index
+import png_encode
+import png_filter
+import png_resize
+import svg_render
+
+SOURCE_EXTS = (".svg", ".png")
+OUTPUT_SUFFIX = ".new.png"
+# Outputs of this script and of png_filter.py, never treated as sources.
+GENERATED_SUFFIXES = (OUTPUT_SUFFIX, ".newf.png")
+# Bump when a stage changes its output, so old manifest entries are rebuilt.
+PIPELINE_VERSION = 3
+
+
+def find_inputs(paths: list[str]) -> list[str]:
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(GENERATED_SUFFIXES):
+                    continue
+                if name.lower().endswith(SOURCE_EXTS):
+                    found.append(os.path.join(root, name))
+    return found
+
+
+def output_path(infile: str) -> str:
+    file, ext = os.path.splitext(infile)
+    return file + OUTPUT_SUFFIX
+
+
+def source_hash(infile: str, options: dict) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([PIPELINE_VERSION, options], sort_keys=True).encode())
+    with open(infile, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Result(t.NamedTuple):
+    # Seconds spent per stage.
+    timings: dict[str, float]
+    # Size with Pillow's default PNG settings, for the bytes-saved report.
+    default_size: int
+    encoded: png_encode.Encoded
+
+
+def build(infile: str, options: dict) -> Result:
+    """Run one input through the pipeline."""
+    timings = {}
+    start = time.perf_counter()
+    if infile.lower().endswith(".svg"):
+        im = svg_render.RENDERERS[options["backend"]](infile, svg_render.SIZE)
+        im = svg_render.fit(im)
+        timings["render"] = time.perf_counter() - start
+    else:
+        with Image.open(infile) as src:
+            src.load()
+            timings["load"] = time.perf_counter() - start
+            start = time.perf_counter()
+            im = png_resize.resize(src)
+            timings["resize"] = time.perf_counter() - start
+
+    if options["filter"]:
+        start = time.perf_counter()
+        im = png_filter.sharpen(im)
+        timings["filter"] = time.perf_counter() - start
+
+    default = io.BytesIO()
+    im.save(default, "PNG")
+
+    start = time.perf_counter()
+    encoded = png_encode.save(
+        im,
+        output_path(infile),
+        budget=options["budget"],
+        max_loss=options["max_loss"],
+        strip=options["strip"],
+    )
+    timings["encode"] = time.perf_counter() - start
+    # The bytes stay in the worker; the report only needs their size.
+    return Result(timings, len(default.getvalue()), encoded._replace(data=b""))
+
+
+def load_manifest(path: str) -> dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(path: str, manifest: dict[str, str]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="SVG/PNG files or directories")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--manifest", default=".png_build.json")
+    parser.add_argument("--force", action="store_true", help="rebuild everything")
+    parser.add_argument("--no-filter", dest="filter", action="store_false")
+    parser.add_argument("--backend", default="cairosvg", choices=svg_render.BACKENDS)
+    parser.add_argument("--budget", type=int, default=png_encode.BUDGET)
+    parser.add_argument("--max-loss", type=float, default=0.0)
+    parser.add_argument("--keep-metadata", dest="strip", action="store_false")
+    parser.add_argument("--index", default=".emoji_index.json")
+    parser.add_argument("--variant", action="append", choices=emoji_index.VARIANTS)
+    parser.add_argument(
+        "--skin-tone", action="append", type=emoji_index.parse_skin_tone
+    )
+    args = parser.parse_args()
+
+    options = {
+        "filter": args.filter,
+        "backend": args.backend,
+        "budget": args.budget,
+        "max_loss": args.max_loss,
+        "strip": args.strip,
+    }
+    manifest = load_manifest(args.manifest)
+    if args.variant or args.skin_tone:
+        index = emoji_index.EmojiIndex(args.index)
+        stickers = index.resolve(
+            args.paths, args.variant, args.skin_tone, suffixes=SOURCE_EXTS
+        )
+        index.save()
+        inputs = [s.path for s in stickers if not s.path.endswith(GENERATED_SUFFIXES)]
+    else:
+        inputs = find_inputs(args.paths)
+
+    wall = time.perf_counter()
+    todo, hashes, skipped = [], {}, 0
+    for infile in inputs:
+        try:
+            hashes[infile] = source_hash(infile, options)
+        except Exception as e:
+            print(infile, e)
+            continue
+        key = os.path.abspath(infile)
+        unchanged = manifest.get(key) == hashes[infile]
+        if unchanged and not args.force and os.path.exists(output_path(infile)):
+            skipped += 1
+        else:
+            todo.append(infile)
+
+    stage_totals: dict[str, float] = defaultdict(float)
+    built = failed = over = default_total = encoded_total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(build, f, options): f for f in todo}
+            for future in as_completed(futures):
+                infile = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(infile, e)
+                    manifest.pop(os.path.abspath(infile), None)
+                    failed += 1
+                    continue
+                for stage, seconds in result.timings.items():
+                    stage_totals[stage] += seconds
+                size = os.path.getsize(output_path(infile))
+                default_total += result.default_size
+                encoded_total += size
+                over += size > args.budget
+                print(
+                    f"{infile}: {result.default_size} -> {size} bytes"
+                    f" ({result.default_size - size} saved, {result.encoded.mode},"
+                    f" loss {result.encoded.loss:.2f})"
+                )
+                manifest[os.path.abspath(infile)] = hashes[infile]
+                built += 1
+    finally:
+        save_manifest(args.manifest, manifest)
+
+    wall = time.perf_counter() - wall
+    print(
+        f"{len(inputs)} inputs: {built} built, {skipped} unchanged, {failed} failed"
+        f" in {wall:.2f}s with {args.jobs} workers"
+    )
+    print(
+        f"  encoded {default_total} -> {encoded_total} bytes,"
+        f" {default_total - encoded_total} saved; {over} over budget"
+    )
+    for stage, seconds in stage_totals.items():
+        print(f"  {stage:<8}{seconds:8.2f}s total {seconds / built * 1e3:8.1f}ms/file")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""Encode sticker PNGs as small as possible within a byte budget.
+
+Candidates are tried from lossless to lossy: zlib level 9 with filter
+search, an exact palette when the image has at most 256 RGBA colors, then
+alpha-preserving palettes of fewer and fewer colors. The smallest candidate
+within `max_loss` wins; if none of those fits the budget, the least lossy one
+that does. Loss is the RMS difference of the premultiplied RGBA pixels, so
+colors hidden under full transparency don't count.
+"""
+
+import argparse
+import io
+import os
+import sys
+import typing as t
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageChops, ImageStat, features
+from PIL.PngImagePlugin import PngInfo
+
+# Telegram's limit for static sticker files.
+BUDGET = 512 * 1024
+PALETTE_COLORS = (256, 128, 64, 32, 16)
+QUANTIZE = (
+    Image.Quantize.LIBIMAGEQUANT
+    if features.check_feature("libimagequant")
+    else Image.Quantize.FASTOCTREE
+)
+
+
+class Encoded(t.NamedTuple):
+    data: bytes
+    # "RGBA", or "P<n>" for a palette of n colors.
+    mode: str
+    loss: float
+
+
+def metadata(im: Image.Image) -> dict:
+    """save() arguments that carry over text chunks, ICC profile and EXIF."""
+    info = PngInfo()
+    for key, value in im.info.items():
+        if isinstance(value, str):
+            info.add_text(key, value)
+    return {
+        "pnginfo": info,
+        "icc_profile": im.info.get("icc_profile"),
+        "exif": im.info.get("exif"),
+    }
+
+
+def loss(original: Image.Image, candidate: Image.Image) -> float:
+    a = original.convert("RGBA").convert("RGBa")
+    b = candidate.convert("RGBA").convert("RGBa")
+    rms = ImageStat.Stat(ImageChops.difference(a, b)).rms
+    return sum(rms) / len(rms)
+
+
+def _save(im: Image.Image, extra: dict) -> bytes:
+    buf = io.BytesIO()
+    im.save(buf, "PNG", compress_level=9, optimize=True, **extra)
+    return buf.getvalue()
+
+
+def encode(
+    im: Image.Image, budget: int = BUDGET, max_loss: float = 0.0, strip: bool = True
+) -> Encoded:
+    extra = {"icc_profile": None} if strip else metadata(im)
+    if im.mode not in ("RGBA", "RGB", "LA", "L"):
+        im = im.convert("RGBA")
+
+    candidates = [Encoded(_save(im, extra), im.mode, 0.0)]
+    if im.getcolors(256) is not None:
+        # At most 256 distinct colors: a palette can hold them all losslessly.
+        palette = im.convert("RGBA").quantize(256, method=QUANTIZE)
+        candidates.append(Encoded(_save(palette, extra), "P256", loss(im, palette)))
+
+    def pick() -> Encoded | None:
+        fits = [c for c in candidates if len(c.data) <= budget]
+        good = [c for c in fits if c.loss <= max_loss]
+        if good:
+            return min(good, key=lambda c: len(c.data))
+        return min(fits, key=lambda c: c.loss) if fits else None
+
+    for colors in PALETTE_COLORS:
+        best = pick()
+        if best is not None and (max_loss == 0 or best.loss > max_loss):
+            break
+        palette = im.convert("RGBA").quantize(colors, method=QUANTIZE)
+        cand = Encoded(_save(palette, extra), f"P{colors}", loss(im, palette))
+        candidates.append(cand)
+        if best is not None and cand.loss > max_loss:
+            # Fewer colors only lose more; the budget is already met.
+            break
+    best = pick()
+    return best or min(candidates, key=lambda c: len(c.data))
+
+
+def save(im: Image.Image, outfile: str, **kwargs) -> Encoded:
+    encoded = encode(im, **kwargs)
+    with open(outfile, "wb") as f:
+        f.write(encoded.data)
+    return encoded
+
+
+def recompress(infile: str, budget: int, max_loss: float, strip: bool) -> Encoded:
+    """Re-encode a PNG in place, keeping the file if it is already smaller."""
+    with Image.open(infile) as im:
+        im.load()
+        encoded = encode(im, budget, max_loss, strip)
+    if len(encoded.data) < os.path.getsize(infile):
+        tmp = infile + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(encoded.data)
+        os.replace(tmp, infile)
+    return encoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--budget", type=int, default=BUDGET, help="bytes per file")
+    parser.add_argument(
+        "--max-loss", type=float, default=0.0, help="RMS loss allowed below budget"
+    )
+    parser.add_argument("--keep-metadata", dest="strip", action="store_false")
+    args = parser.parse_args()
+
+    before = after = over = failed = 0
+    sizes = {}
+    for infile in args.files:
+        try:
+            sizes[infile] = os.path.getsize(infile)
+        except OSError as e:
+            print(infile, e)
+            failed += 1
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            pool.submit(recompress, f, args.budget, args.max_loss, args.strip): f
+            for f in sizes
+        }
+        for future in as_completed(futures):
+            infile = futures[future]
+            try:
+                encoded = future.result()
+            except Exception as e:
+                print(infile, e)
+                failed += 1
+                continue
+            old, new = sizes[infile], min(sizes[infile], len(encoded.data))
+            before += old
+            after += new
+            over += new > args.budget
+            print(
+                f"{infile}: {old} -> {new} bytes ({old - new} saved,"
+                f" {encoded.mode}, loss {encoded.loss:.2f})"
+            )
+    print(
+        f"{len(args.files)} files: {before} -> {after} bytes, {before - after} saved;"
+        f" {over} over budget, {failed} failed"
+    )
+    sys.exit(1 if failed or over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,19 @@ import sys
 
 from PIL import Image, ImageFilter
 
-for infile in sys.argv[1:]:
-    file, ext = os.path.splitext(infile)
-    with Image.open(infile) as im:
-        try:
-            im = im.filter(ImageFilter.EDGE_ENHANCE)
-            im = im.filter(ImageFilter.SHARPEN)
+import png_encode
 
-            im.save(file + "f" + ext, "PNG")
-        except Exception as e:
-            print(infile, e)
+
+def sharpen(im: Image.Image) -> Image.Image:
+    im = im.filter(ImageFilter.EDGE_ENHANCE)
+    return im.filter(ImageFilter.SHARPEN)
+
+
+if __name__ == "__main__":
+    for infile in sys.argv[1:]:
+        file, ext = os.path.splitext(infile)
+        with Image.open(infile) as im:
+            try:
+                png_encode.save(sharpen(im), file + "f" + ext)
+            except Exception as e:
+                print(infile, e)
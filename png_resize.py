@@ -5,10 +5,18 @@ import sys
 
 from PIL import Image
 
+import png_encode
+
 size = 512, 512
 
-for infile in sys.argv[1:]:
-    file, ext = os.path.splitext(infile)
-    with Image.open(infile) as im:
-        im.thumbnail(size)
-        im.save(file + ".new.png", "PNG")
+
+def resize(im: Image.Image) -> Image.Image:
+    im.thumbnail(size)
+    return im
+
+
+if __name__ == "__main__":
+    for infile in sys.argv[1:]:
+        file, ext = os.path.splitext(infile)
+        with Image.open(infile) as im:
+            png_encode.save(resize(im), file + ".new.png")
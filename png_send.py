@@ -1,66 +1,249 @@
 #!/usr/bin/env python
+"""Add sticker PNGs to the sticker set in one process, resuming from a manifest.
 
+Files are uploaded concurrently, then added to the set one by one in input
+order, so the set keeps the order they were given in. Every upload and add is
+recorded in the manifest and checked against the live set on the next run, so
+a rerun skips only what is really still in the set (png_clean.py empties it).
+"""
+
+import argparse
 import asyncio
+import hashlib
 import json
 import logging
 import os
-import sys
+from collections import defaultdict, deque
 
 from telegram import Bot
+from telegram.error import NetworkError, RetryAfter
+from telegram.request import HTTPXRequest
+
+import emoji_index
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
 )
+logger = logging.getLogger(__name__)
 
 MY_USER_ID = 1
 MY_TOKEN = "2"
 MY_STICKER_SET = "3"
 
+MAX_ATTEMPTS = 5
+
+
+def file_hash(infile: str) -> str:
+    with open(infile, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class RateLimiter:
+    """Spaces calls `1 / rate` seconds apart; a flood wait pauses everyone."""
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(self._next, loop.time()) + self._interval
+
+    def pause(self, seconds: float):
+        loop = asyncio.get_running_loop()
+        self._next = max(self._next, loop.time() + seconds)
+
+
+class Manifest:
+    """JSON file of per-set upload state: {set: {path: {sha256, emoji, ...}}}."""
+
+    def __init__(self, path: str, sticker_set: str):
+        self._path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            self._data = {}
+        self.entries: dict[str, dict] = self._data.setdefault(sticker_set, {})
+
+    def get(self, infile: str, digest: str) -> dict:
+        """The entry for `infile`, reset if the file changed since it was sent."""
+        key = os.path.abspath(infile)
+        entry = self.entries.get(key)
+        if entry is None or entry.get("sha256") != digest:
+            entry = self.entries[key] = {"sha256": digest}
+        return entry
+
+    def save(self):
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=1, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, self._path)
 
-async def run(bot):
-    for infile in sys.argv[1:]:
-        if "Color" not in infile:
-            continue
-        if "Dark" in infile:
-            continue
-        if "Light" in infile:
-            continue
-        if "Medium" in infile:
-            continue
 
-        splitted = os.path.split(infile)
+def reconcile(entries: list[dict], current):
+    """Mark manifest entries added only if their sticker is in `current`.
 
-        emoji = ""
+    Entries that know their file_unique_id are checked directly. The others
+    are paired, in order, with unclaimed set stickers of the same emoji; each
+    emoji has its own queue, so one mismatch doesn't shift the rest.
+    """
+    in_set = {s.file_unique_id for s in current.stickers}
+    claimed = {entry.get("file_unique_id") for entry in entries}
+    unclaimed: dict[str, deque[str]] = defaultdict(deque)
+    for s in current.stickers:
+        if s.file_unique_id not in claimed:
+            unclaimed[s.emoji].append(s.file_unique_id)
+    for entry in entries:
+        uid = entry.get("file_unique_id")
+        if uid is None and entry.get("added") and unclaimed[entry.get("emoji")]:
+            uid = entry["file_unique_id"] = unclaimed[entry["emoji"]].popleft()
+        if uid not in in_set:
+            entry.pop("file_unique_id", None)
+            entry["added"] = False
+
+
+async def call(limiter: RateLimiter, method, *args, **kwargs):
+    for attempt in range(MAX_ATTEMPTS):
+        await limiter.wait()
         try:
-            with open(splitted[0] + "/../metadata.json", "rb") as meta:
-                emoji = json.load(meta)["glyph"]
-        except Exception:
-            with open(splitted[0] + "/../../metadata.json", "rb") as meta:
-                emoji = json.load(meta)["glyph"]
+            return await method(*args, **kwargs)
+        except RetryAfter as e:
+            logger.warning("Flood wait %ss on %s", e.retry_after, method.__name__)
+            limiter.pause(e.retry_after)
+        except NetworkError as e:
+            if attempt + 1 == MAX_ATTEMPTS:
+                raise
+            logger.warning("%s failed, retrying: %s", method.__name__, e)
+            await asyncio.sleep(2**attempt)
+    raise RuntimeError(f"{method.__name__} still flood-limited after {MAX_ATTEMPTS}")
+
 
+async def upload(bot, limiter: RateLimiter, semaphore: asyncio.Semaphore, infile):
+    async with semaphore:
         with open(infile, "rb") as sticker:
-            print("->", infile, emoji)
-            res = await bot.add_sticker_to_set(
-                # res = await bot.create_new_sticker_set(
+            file = await call(
+                limiter, bot.upload_sticker_file, MY_USER_ID, png_sticker=sticker
+            )
+        return file.file_id
+
+
+async def add_in_order(
+    bot,
+    limiter: RateLimiter,
+    sticker_set: str,
+    jobs: list[tuple[str, dict, asyncio.Task | None]],
+    manifest: Manifest,
+) -> list[str]:
+    """Add (path, manifest entry, pending upload) jobs to the set one by one.
+
+    Returns the paths that were added, in order.
+    """
+    added = []
+    for infile, entry, task in jobs:
+        try:
+            if task:
+                entry["file_id"] = await task
+                manifest.save()
+
+            print("->", infile, entry["emoji"])
+            await call(
+                limiter,
+                bot.add_sticker_to_set,
                 MY_USER_ID,
-                MY_STICKER_SET + "_by_just_another_bot",
-                # MY_STICKER_SET,
-                emoji,
-                png_sticker=sticker,
+                sticker_set,
+                entry["emoji"],
+                png_sticker=entry["file_id"],
             )
-            print(res)
+        except Exception as e:
+            print(infile, e)
+            # Uploaded file ids expire; upload again on the next run.
+            entry.pop("file_id", None)
+            manifest.save()
+            continue
+        entry["added"] = True
+        manifest.save()
+        added.append(infile)
+    return added
+
+
+async def run(
+    bot,
+    stickers: list[emoji_index.Sticker],
+    manifest: Manifest,
+    concurrency: int,
+    rate: float,
+):
+    sticker_set = MY_STICKER_SET + "_by_just_another_bot"
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    current = await call(limiter, bot.get_sticker_set, sticker_set)
+    entries = []
+    for sticker in stickers:
+        try:
+            entries.append(
+                (sticker, manifest.get(sticker.path, file_hash(sticker.path)))
+            )
+        except Exception as e:
+            print(sticker.path, e)
+    reconcile([entry for sticker, entry in entries], current)
+    manifest.save()
+
+    jobs = []
+    for sticker, entry in entries:
+        infile = sticker.path
+        entry["emoji"] = sticker.glyph
+        if entry.get("added"):
+            continue
+        task = None
+        if not entry.get("file_id"):
+            task = asyncio.create_task(upload(bot, limiter, semaphore, infile))
+        jobs.append((infile, entry, task))
+    print(f"{len(stickers)} stickers, {len(stickers) - len(jobs)} already in the set")
+
+    added = await add_in_order(bot, limiter, sticker_set, jobs, manifest)
+    print(f"added {len(added)}/{len(jobs)}")
 
 
 async def check(bot):
-    res = await bot.get_sticker_set(MY_STICKER_SET)
+    res = await bot.get_sticker_set(MY_STICKER_SET + "_by_just_another_bot")
     print(res)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="*.new.png files or directories")
+    parser.add_argument("--manifest", default=".png_send.json")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="requests/second")
+    parser.add_argument("--index", default=".emoji_index.json")
+    parser.add_argument(
+        "--variant", action="append", choices=emoji_index.VARIANTS, default=[]
+    )
+    parser.add_argument(
+        "--skin-tone", action="append", type=emoji_index.parse_skin_tone, default=[]
+    )
+    args = parser.parse_args()
 
     async def main():
-        async with Bot(MY_TOKEN) as bot:
+        request = HTTPXRequest(connection_pool_size=args.concurrency + 1)
+        async with Bot(MY_TOKEN, request=request) as bot:
             # await check(bot)
-            await run(bot)
+            manifest = Manifest(args.manifest, MY_STICKER_SET)
+            index = emoji_index.EmojiIndex(args.index)
+            stickers = index.resolve(
+                args.paths,
+                variants=args.variant or ["Color"],
+                skin_tones=args.skin_tone or [None, "Default"],
+                suffixes=(".new.png",),
+            )
+            index.save()
+            await run(bot, stickers, manifest, args.concurrency, args.rate)
 
     asyncio.run(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""Make the sticker set match a list of local PNGs, touching only what differs.
+
+The set is fetched once and compared to the desired stickers by content hash
+and emoji through the png_send manifest, which remembers which set sticker
+each local file became. Stale stickers are deleted and new files uploaded
+concurrently under the shared rate limit; adds and moves go one at a time
+because Telegram appends and repositions relative to the current order, and
+only stickers outside the longest already-ordered run are moved.
+"""
+
+import argparse
+import asyncio
+import os
+import typing as t
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+import emoji_index
+import png_send
+
+
+class Plan(t.NamedTuple):
+    # file_unique_id -> file_id of set stickers to drop.
+    deletes: dict[str, str]
+    # (path, manifest entry) of stickers to add, in desired order.
+    adds: list[tuple[str, dict]]
+    # Desired order: file_unique_id for kept stickers, path for added ones.
+    order: list[str]
+    uploads: int
+
+
+def plan(
+    stickers: list[emoji_index.Sticker], manifest: png_send.Manifest, current
+) -> Plan:
+    """Diff the desired stickers against `current` (a telegram StickerSet)."""
+    entries = []
+    for sticker in stickers:
+        try:
+            entry = manifest.get(sticker.path, png_send.file_hash(sticker.path))
+        except Exception as e:
+            print(sticker.path, e)
+            continue
+        entries.append((sticker, entry))
+
+    # png_send doesn't learn the ids of what it adds; adopt them by emoji.
+    png_send.reconcile([entry for sticker, entry in entries], current)
+
+    in_set = {s.file_unique_id: s for s in current.stickers}
+    deletes = {uid: s.file_id for uid, s in in_set.items()}
+    adds, order, uploads = [], [], 0
+    for sticker, entry in entries:
+        uid = entry.get("file_unique_id")
+        if uid in deletes and in_set[uid].emoji == sticker.glyph:
+            del deletes[uid]
+            order.append(uid)
+            continue
+        # New, changed, or its emoji was edited: Bot API 6.5 can only replace.
+        entry.pop("file_unique_id", None)
+        entry["added"] = False
+        entry["emoji"] = sticker.glyph
+        adds.append((sticker.path, entry))
+        order.append(sticker.path)
+        uploads += not entry.get("file_id")
+    return Plan(deletes, adds, order, uploads)
+
+
+def longest_ordered(positions: list[int]) -> set[int]:
+    """Indices into `positions` of one longest increasing subsequence."""
+    tails: list[int] = []
+    prev = [-1] * len(positions)
+    for i, pos in enumerate(positions):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if positions[tails[mid]] < pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        prev[i] = tails[lo - 1] if lo else -1
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+    keep = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        keep.add(i)
+        i = prev[i]
+    return keep
+
+
+def moves(current: list[str], desired: list[str]) -> list[tuple[str, int]]:
+    """set_sticker_position_in_set calls that turn `current` into `desired`.
+
+    Both hold the same items. Items on the longest run already in desired
+    order stay put; each other one is moved right after its desired
+    predecessor, in desired order, so every move lands next to a settled item.
+    """
+    index = {item: i for i, item in enumerate(current)}
+    keep = longest_ordered([index[item] for item in desired])
+    order = list(current)
+    calls = []
+    for i, item in enumerate(desired):
+        if i in keep:
+            continue
+        order.remove(item)
+        position = order.index(desired[i - 1]) + 1 if i else 0
+        order.insert(position, item)
+        calls.append((item, position))
+    assert order == desired
+    return calls
+
+
+def print_plan(p: Plan, current):
+    emoji = {s.file_unique_id: s.emoji for s in current.stickers}
+    for uid in p.deletes:
+        print("- delete", emoji[uid], uid)
+    for path, entry in p.adds:
+        print("+ add   ", entry["emoji"], path)
+    after_adds = [s.file_unique_id for s in current.stickers]
+    after_adds = [u for u in after_adds if u not in p.deletes]
+    after_adds += [path for path, entry in p.adds]
+    planned = moves(after_adds, p.order)
+    for item, position in planned:
+        print("~ move  ", emoji.get(item, ""), item, "->", position)
+    calls = p.uploads + len(p.deletes) + len(p.adds) + len(planned)
+    # The first get_sticker_set is done; adds need one more to learn their ids.
+    calls += 1 if p.adds else 0
+    print(
+        f"{len(p.order)} stickers: {len(p.order) - len(p.adds)} kept,"
+        f" {len(p.deletes)} deleted, {len(p.adds)} added ({p.uploads} uploads),"
+        f" {len(planned)} moved; ~{calls} API calls"
+    )
+
+
+async def sync(
+    bot,
+    stickers: list[emoji_index.Sticker],
+    manifest: png_send.Manifest,
+    concurrency: int,
+    rate: float,
+    dry_run: bool,
+):
+    sticker_set = png_send.MY_STICKER_SET + "_by_just_another_bot"
+    limiter = png_send.RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    current = await png_send.call(limiter, bot.get_sticker_set, sticker_set)
+    p = plan(stickers, manifest, current)
+    if dry_run:
+        print_plan(p, current)
+        return
+    manifest.save()
+
+    async def delete(file_id: str):
+        async with semaphore:
+            return await png_send.call(limiter, bot.delete_sticker_from_set, file_id)
+
+    # A set can't lose its last sticker, so one stale sticker outlives the adds.
+    deferred = {}
+    if p.deletes and len(p.deletes) == len(current.stickers) and p.adds:
+        uid = next(iter(p.deletes))
+        deferred[uid] = p.deletes.pop(uid)
+
+    uploads = {
+        path: asyncio.create_task(png_send.upload(bot, limiter, semaphore, path))
+        for path, entry in p.adds
+        if not entry.get("file_id")
+    }
+    results = await asyncio.gather(
+        *(delete(file_id) for file_id in p.deletes.values()), return_exceptions=True
+    )
+    for uid, res in zip(p.deletes, results, strict=True):
+        if isinstance(res, Exception):
+            print("delete", uid, res)
+
+    jobs = [(path, entry, uploads.get(path)) for path, entry in p.adds]
+    added = await png_send.add_in_order(bot, limiter, sticker_set, jobs, manifest)
+
+    for uid, file_id in deferred.items():
+        try:
+            await png_send.call(limiter, bot.delete_sticker_from_set, file_id)
+        except Exception as e:
+            print("delete", uid, e)
+
+    final = current
+    if p.deletes or deferred or p.adds:
+        final = await png_send.call(limiter, bot.get_sticker_set, sticker_set)
+    # Adds were sequential, so new stickers follow the old ones in add order.
+    known = {s.file_unique_id for s in current.stickers}
+    fresh = [s.file_unique_id for s in final.stickers if s.file_unique_id not in known]
+    if len(fresh) != len(added):
+        print(f"expected {len(added)} new stickers, found {len(fresh)}; not moving")
+        return
+    for path, uid in zip(added, fresh, strict=True):
+        manifest.entries[os.path.abspath(path)]["file_unique_id"] = uid
+    manifest.save()
+
+    renamed = dict(zip(added, fresh, strict=True))
+    desired = [renamed.get(item, item) for item in p.order]
+    if set(desired) != {s.file_unique_id for s in final.stickers}:
+        print("set differs from the plan, some calls failed; not moving")
+        return
+    file_ids = {s.file_unique_id: s.file_id for s in final.stickers}
+    current_order = [s.file_unique_id for s in final.stickers]
+    planned = moves(current_order, desired)
+    for uid, position in planned:
+        await png_send.call(
+            limiter, bot.set_sticker_position_in_set, file_ids[uid], position
+        )
+    print(
+        f"{len(desired)} stickers: {len(p.deletes) + len(deferred)} deleted,"
+        f" {len(added)}/{len(p.adds)} added, {len(planned)} moved"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="*.new.png files or directories")
+    parser.add_argument("-n", "--dry-run", action="store_true")
+    parser.add_argument("--manifest", default=".png_send.json")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="requests/second")
+    parser.add_argument("--index", default=".emoji_index.json")
+    parser.add_argument(
+        "--variant", action="append", choices=emoji_index.VARIANTS, default=[]
+    )
+    parser.add_argument(
+        "--skin-tone", action="append", type=emoji_index.parse_skin_tone, default=[]
+    )
+    args = parser.parse_args()
+
+    async def main():
+        request = HTTPXRequest(connection_pool_size=args.concurrency + 1)
+        async with Bot(png_send.MY_TOKEN, request=request) as bot:
+            manifest = png_send.Manifest(args.manifest, png_send.MY_STICKER_SET)
+            index = emoji_index.EmojiIndex(args.index)
+            stickers = index.resolve(
+                args.paths,
+                variants=args.variant or ["Color"],
+                skin_tones=args.skin_tone or [None, "Default"],
+                suffixes=(".new.png",),
+            )
+            index.save()
+            await sync(
+                bot, stickers, manifest, args.concurrency, args.rate, args.dry_run
+            )
+
+    asyncio.run(main())
@@ -1,20 +1,40 @@
 import asyncio
+import atexit
+import bisect
+import contextlib
+import copy
 import datetime as dt
 import difflib
+import email.parser
+import email.utils
+import hashlib
+import itertools
 import json
 import logging
+import math
 import os
+import queue
+import random
+import re
+import signal
+import sqlite3
 import sys
+import time
 import typing as t
-from collections import defaultdict
+import urllib.parse
+import uuid
+from collections import Counter, OrderedDict, defaultdict, deque
+from logging.handlers import QueueHandler, QueueListener
 
+import aiohttp
 import google_auth_httplib2
 import httplib2
+import prometheus_client as prom
 from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import HttpRequest
 from telethon import TelegramClient, events
+from telethon import utils as tg_utils
 from telethon.sessions import StringSession
+from telethon.tl import types
 from telethon.tl.custom import Message
 
 
@@ -45,11 +65,41 @@ class StructuredFormatter(logging.Formatter):
         "taskName",
     }
 
+    def __init__(
+        self,
+        *args,
+        max_field_len: int = 1000,
+        max_items: int = 50,
+        field_limits: dict[str, int] | None = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._max_field_len = max_field_len
+        self._max_items = max_items
+        self._field_limits = field_limits or {}
+
+    def _truncate(self, key: str, value: t.Any) -> t.Any:
+        if isinstance(value, str):
+            limit = self._field_limits.get(key, self._max_field_len)
+            if limit and len(value) > limit:
+                return f"{value[:limit]}...(+{len(value) - limit} chars)"
+        elif isinstance(value, list | tuple | set | frozenset):
+            limit = self._field_limits.get(key, self._max_items)
+            if limit and len(value) > limit:
+                items = list(value)
+                return [*items[:limit], f"...(+{len(items) - limit} items)"]
+        return value
+
+    def extras(self, record: logging.LogRecord) -> dict[str, t.Any]:
+        return {
+            k: self._truncate(k, v)
+            for k, v in record.__dict__.items()
+            if k not in self.STANDARD_ATTRIBS
+        }
+
     def format(self, record):
         s = super().format(record)
-        extra_data = {
-            k: v for k, v in record.__dict__.items() if k not in self.STANDARD_ATTRIBS
-        }
+        extra_data = self.extras(record)
         if extra_data:
             try:
                 json_extras = json.dumps(extra_data, default=repr, ensure_ascii=False)
@@ -60,17 +110,193 @@ class StructuredFormatter(logging.Formatter):
         return s
 
 
-handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(
-    StructuredFormatter(
+class JsonLinesFormatter(StructuredFormatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **self.extras(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=repr, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Keep only every `every`-th DEBUG record per message template."""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self._every = every
+        self._seen: Counter[tuple[str, t.Any]] = Counter()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self._every <= 1:
+            return True
+        key = (record.name, record.msg)
+        self._seen[key] += 1
+        return self._seen[key] % self._every == 1
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full.
+
+    Formatting, truncation and the JSON encoding of extras happen in the
+    listener thread; only the message and traceback are rendered here.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_field_limits(value: str) -> dict[str, int]:
+    limits = {}
+    for item in filter(None, value.split(",")):
+        key, _, limit = item.partition("=")
+        limits[key.strip()] = int(limit)
+    return limits
+
+
+def setup_logging():
+    fmt_cls = JsonLinesFormatter if os.getenv("LOG_FORMAT") == "json" else None
+    formatter = (fmt_cls or StructuredFormatter)(
         fmt="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
+        max_field_len=int(os.getenv("LOG_MAX_FIELD_LEN", "1000")),
+        max_items=int(os.getenv("LOG_MAX_ITEMS", "50")),
+        field_limits=parse_field_limits(
+            os.getenv("LOG_FIELD_LIMITS", "text=500,summaries=20,data=20")
+        ),
     )
-)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    handler: logging.Handler = stream_handler
+    if os.getenv("LOG_QUEUE", "1") == "1":
+        log_queue: queue.Queue = queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        handler = DroppingQueueHandler(log_queue)
+        listener = QueueListener(log_queue, stream_handler)
+        listener.start()
+        atexit.register(listener.stop)
+    handler.addFilter(DebugSampler(int(os.getenv("LOG_DEBUG_SAMPLE", "1"))))
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(level=level, handlers=[handler])
 
-logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+setup_logging()
 logger = logging.getLogger("app")
 
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+MESSAGES_RECEIVED = prom.Counter(
+    "forwarder_messages_received_total", "Non-empty messages accepted by intake"
+)
+MESSAGES = prom.Counter(
+    "forwarder_messages_total", "Processed messages by final outcome", ["outcome"]
+)
+EVENTS_EXTRACTED = prom.Counter(
+    "forwarder_events_extracted_total", "Events extracted by the LLM"
+)
+DEDUP_HITS = prom.Counter(
+    "forwarder_dedup_hits_total", "Extracted events matching an existing one"
+)
+STAGE_SECONDS = prom.Histogram(
+    "forwarder_stage_seconds",
+    "Time spent by a stage worker on one item",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_INFLIGHT = prom.Gauge(
+    "forwarder_stage_inflight", "Items being handled by stage workers", ["stage"]
+)
+STAGE_QUEUE = prom.Gauge(
+    "forwarder_stage_queue_depth", "Items waiting in a stage queue", ["stage"]
+)
+STAGE_DROPPED = prom.Counter(
+    "forwarder_stage_dropped_total", "Items dropped by a full stage queue", ["stage"]
+)
+OPERATION_SECONDS = prom.Histogram(
+    "forwarder_operation_seconds",
+    "Latency of pipeline operations",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_SECONDS = prom.Histogram(
+    "forwarder_llm_request_seconds",
+    "Latency of a single model attempt",
+    ["model", "result"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_FALLBACKS = prom.Counter(
+    "forwarder_llm_fallbacks_total", "Model attempts beyond the first one"
+)
+LLM_FAILURES = prom.Counter(
+    "forwarder_llm_failures_total", "Completions where every model failed"
+)
+LLM_BATCH_SIZE = prom.Histogram(
+    "forwarder_llm_batch_size",
+    "Messages sent in one batched completion",
+    buckets=(1, 2, 4, 8, 16, 32),
+)
+LLM_BATCH_FALLBACKS = prom.Counter(
+    "forwarder_llm_batch_fallbacks_total",
+    "Batched answers that were malformed and retried per message",
+)
+LLM_CACHE = prom.Counter(
+    "forwarder_llm_cache_total", "Extraction cache lookups", ["result"]
+)
+PREFILTER = prom.Counter(
+    "forwarder_prefilter_total", "Temporal prefilter decisions", ["result"]
+)
+PROMPT_CHARS = prom.Counter(
+    "forwarder_prompt_chars_total",
+    "Message characters before and after compaction",
+    ["stage"],
+)
+LLM_PROMPT_CHARS = prom.Counter(
+    "forwarder_llm_prompt_chars_total",
+    "System and user prompt characters of answered requests",
+    ["model"],
+)
+LLM_TOKENS = prom.Counter(
+    "forwarder_llm_tokens_total", "Tokens reported by the model API", ["model", "kind"]
+)
+CALENDAR_REQUEST_SECONDS = prom.Histogram(
+    "forwarder_calendar_request_seconds",
+    "Latency of Calendar API requests",
+    ["op"],
+    buckets=LATENCY_BUCKETS,
+)
+RATE_LIMIT_WAIT = prom.Histogram(
+    "forwarder_rate_limit_wait_seconds",
+    "Time spent waiting for a rate limiter",
+    ["limiter"],
+    buckets=LATENCY_BUCKETS,
+)
+RATE_LIMIT_WAITING = prom.Gauge(
+    "forwarder_rate_limit_waiting", "Callers queued on a rate limiter", ["limiter"]
+)
+
 
 PROMPT_TEMPLATE = """Extract public events from the message.
 Include only real events people can attend with a specific date/time.
@@ -88,20 +314,368 @@ Rules:
 - Tomorrow = the next day after {now_date_iso}
 - If a date has no year, use {current_year} unless already past, then use {next_year}"""
 
+BATCH_PROMPT_SUFFIX = """
+
+The user message holds several messages, each starting with a line "### <id>".
+Extract events from each message separately and return JSON only in exact format:
+{"messages":[{"id":"<id>","events":[{"date":"YYYY-MM-DD","summary":"short text"}]}]}
+List every id exactly once, with "events":[] when a message has no events."""
+
+
+PIPELINE_STAGES = {
+    "extract": {"workers": 4, "maxsize": 500, "overflow": "drop_new"},
+    "dedup": {"workers": 1, "maxsize": 100, "overflow": "block"},
+    "publish": {"workers": 2, "maxsize": 100, "overflow": "block"},
+}
+
+# Outcomes that may succeed on another try; they are not checkpointed as done.
+RETRY_OUTCOMES = frozenset({"dropped", "error", "forward_failed"})
+
 
 class AsyncRateLimiter:
-    def __init__(self, min_interval: float = 1.0):
+    """Token bucket allowing `rate` acquisitions per second, bursting to `burst`."""
+
+    def __init__(self, rate: float = 1.0, burst: int = 1, name: str = "default"):
         self._lock = asyncio.Lock()
-        self._last = 0.0
-        self._interval = min_interval
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated: float | None = None
+        self._blocked_until = 0.0
+        self._waiting = RATE_LIMIT_WAITING.labels(name)
+        self._wait_seconds = RATE_LIMIT_WAIT.labels(name)
+
+    async def acquire(self, tokens: int = 1):
+        if self._rate <= 0:
+            return
+        with self._wait_seconds.time(), self._waiting.track_inprogress():
+            async with self._lock:
+                await self._take(tokens)
+
+    async def _take(self, tokens: int):
+        # More than `burst` tokens at once goes into debt, which later
+        # acquisitions wait out.
+        need = min(tokens, self._burst)
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            elapsed = now - (self._updated if self._updated is not None else now)
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+            self._updated = now
+
+            wait = self._blocked_until - now
+            if wait <= 0:
+                if self._tokens >= need:
+                    self._tokens -= tokens
+                    return
+                wait = (need - self._tokens) / self._rate
+            await asyncio.sleep(wait)
+
+    def defer(self, delay: float):
+        """Hold off all acquisitions for `delay` seconds, e.g. after Retry-After."""
+        loop = asyncio.get_running_loop()
+        self._blocked_until = max(self._blocked_until, loop.time() + delay)
+        self._tokens = min(self._tokens, 0.0)
+
+
+def parse_retry_after(value: str | None, default: float) -> float:
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max((when - dt.datetime.now(dt.UTC)).total_seconds(), 0.0)
+
+
+class HttpTransport:
+    """Shared aiohttp session with a bounded pool of keep-alive connections."""
+
+    def __init__(
+        self,
+        max_connections: int = 8,
+        connect_timeout: float = 10.0,
+        total_timeout: float = 120.0,
+        keepalive_timeout: float = 60.0,
+    ):
+        self._max_connections = max_connections
+        self._timeout = aiohttp.ClientTimeout(
+            total=total_timeout,
+            sock_connect=connect_timeout,
+        )
+        self._keepalive_timeout = keepalive_timeout
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily: aiohttp sessions must be bound to the running loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._max_connections,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+            )
+        return self._session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, t.Mapping[str, str], bytes]:
+        session = self._get_session()
+        async with session.request(method, url, data=body, headers=headers) as resp:
+            return resp.status, resp.headers, await resp.read()
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> t.AsyncIterator[aiohttp.ClientResponse]:
+        session = self._get_session()
+        async with session.request(method, url, data=body, headers=headers) as resp:
+            yield resp
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class ExtractionCache:
+    """SQLite-backed cache of extracted events keyed by prompt content."""
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 50_000,
+        max_age: float = 14 * 24 * 3600,
+        evict_every: int = 100,
+    ):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " key TEXT PRIMARY KEY,"
+            " events TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS extractions_used ON extractions (used)"
+        )
+        self._db.commit()
+        self._max_entries = max_entries
+        self._max_age = max_age
+        self._evict_every = evict_every
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(user_prompt: str, sys_prompt: str | None) -> str:
+        text = " ".join(user_prompt.casefold().split())
+        digest = hashlib.sha256((sys_prompt or "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> list[dict] | None:
+        now = time.time()
+        row = self._db.execute(
+            "SELECT events, created FROM extractions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now - row[1] > self._max_age:
+            self.misses += 1
+            LLM_CACHE.labels("miss").inc()
+            return None
+
+        self._db.execute("UPDATE extractions SET used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        self.hits += 1
+        LLM_CACHE.labels("hit").inc()
+        return json.loads(row[0])
+
+    def put(self, key: str, events_list: list[dict]):
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+            (key, json.dumps(events_list, ensure_ascii=False), now, now),
+        )
+        self._db.commit()
+        self._puts += 1
+        if self._puts % self._evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        cur = self._db.execute(
+            "DELETE FROM extractions WHERE created < ?",
+            (time.time() - self._max_age,),
+        )
+        expired = cur.rowcount
+        cur = self._db.execute(
+            "DELETE FROM extractions WHERE key IN ("
+            " SELECT key FROM extractions ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+        self._db.commit()
+        logger.debug(
+            "Extraction cache evicted",
+            extra={"expired": expired, "overflow": cur.rowcount},
+        )
+
+    def close(self):
+        self._db.close()
+
 
-    async def acquire(self):
-        async with self._lock:
-            loop = asyncio.get_running_loop()
-            wait = self._interval - (loop.time() - self._last)
-            if wait > 0:
-                await asyncio.sleep(wait)
-            self._last = loop.time()
+class ModelHealth:
+    def __init__(self, latency_prior: float, window: int):
+        self.latency = latency_prior
+        self.success = 1.0
+        self.failures = 0
+        self.updated_at = time.monotonic()
+        self.opened_at: float | None = None
+        self.probing = False
+        self.samples: deque[float] = deque(maxlen=window)
+
+
+class ModelRouter:
+    """Orders fallback models by observed health with per-model circuit breakers.
+
+    A model whose circuit is open is skipped until `cooldown` has passed,
+    then a single half-open probe decides whether it is closed again.
+    """
+
+    def __init__(
+        self,
+        models: t.Sequence[str],
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        recovery: float = 300.0,
+        alpha: float = 0.2,
+        latency_prior: float = 10.0,
+        window: int = 50,
+        min_samples: int = 10,
+    ):
+        self._models = tuple(models)
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._recovery = recovery
+        self._alpha = alpha
+        self._min_samples = min_samples
+        self._health = {m: ModelHealth(latency_prior, window) for m in self._models}
+
+    def _score(self, model: str, now: float) -> float:
+        health = self._health[model]
+        # Old failures fade out so a demoted model eventually gets retried.
+        decay = math.exp(-(now - health.updated_at) / self._recovery)
+        success = 1.0 - (1.0 - health.success) * decay
+        return health.latency / max(success, 0.05)
+
+    def order(self) -> list[str]:
+        now = time.monotonic()
+        closed, half_open = [], []
+        for model in self._models:
+            health = self._health[model]
+            if health.opened_at is None:
+                closed.append(model)
+            elif not health.probing and now - health.opened_at >= self._cooldown:
+                half_open.append(model)
+
+        ordered = sorted(closed, key=lambda m: self._score(m, now)) + half_open
+        # Never leave the caller without candidates, even if every breaker is open.
+        return ordered or list(self._models)
+
+    def record(self, model: str, ok: bool, latency: float):
+        health = self._health[model]
+        health.probing = False
+        health.success += self._alpha * (ok - health.success)
+        health.updated_at = time.monotonic()
+        if ok:
+            health.latency += self._alpha * (latency - health.latency)
+            health.samples.append(latency)
+            health.failures = 0
+            if health.opened_at is not None:
+                logger.info("Circuit closed", extra={"model": model})
+            health.opened_at = None
+            return
+
+        health.failures += 1
+        reopen = health.opened_at is not None
+        if reopen or health.failures >= self._failure_threshold:
+            health.opened_at = time.monotonic()
+            extra = {"model": model, "failures": health.failures}
+            logger.warning("Circuit opened", extra=extra)
+
+    def begin(self, model: str):
+        health = self._health[model]
+        health.probing = health.opened_at is not None
+
+    def release(self, model: str):
+        """Forget a pending half-open probe that was cancelled."""
+        self._health[model].probing = False
+
+    def p95(self, model: str) -> float | None:
+        samples = sorted(self._health[model].samples)
+        if len(samples) < self._min_samples:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+class JsonObjectScanner:
+    """Finds where the first top-level JSON object ends in streamed text."""
+
+    def __init__(self):
+        self.start = -1
+        self.end = -1
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0
+
+    def feed(self, chunk: str) -> bool:
+        for ch in chunk:
+            if self.complete:
+                break
+            pos = self._pos
+            self._pos += 1
+            if self.start < 0:
+                if ch == "{":
+                    self.start = pos
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if not self._depth:
+                    self.end = pos + 1
+        return self.complete
 
 
 class OpenAICompatibleLLM:
@@ -115,19 +689,84 @@ class OpenAICompatibleLLM:
         "nemotron-3-super-free",
     )
     MODEL = FALLBACK_MODELS[0]
+    RETRY_STATUSES = (429, 503)
+    # Stream delta fields carrying a reasoning model's thinking tokens.
+    REASONING_FIELDS = ("reasoning_content", "reasoning")
 
-    def __init__(self, api_key: str | None):
+    def __init__(
+        self,
+        api_key: str | None,
+        transport: HttpTransport | None = None,
+        cache: ExtractionCache | None = None,
+        router: ModelRouter | None = None,
+        hedge: bool = False,
+        rate: float = 1.0,
+        burst: int = 1,
+        stream: bool = False,
+        ttft_timeout: float = 15.0,
+    ):
         self._api_key = api_key
-        self._rate_limiter = AsyncRateLimiter()
+        self._stream = stream
+        self._ttft_timeout = ttft_timeout
+        self._rate = rate
+        self._burst = burst
+        self._rate_limiters: dict[str, AsyncRateLimiter] = {}
+        self._transport = transport or HttpTransport()
+        self._cache = cache
+        self._router = router or ModelRouter(self.FALLBACK_MODELS)
+        self._hedge = hedge
+        # Totals over answered requests: prompt_chars, prompt/completion_tokens
+        # and requests_without_usage (answers that carried no usage field).
+        self.usage: Counter[str] = Counter()
+        if stream:
+            logger.info(
+                "Streaming LLM answers stop early; token counts are mostly"
+                " unavailable, prompt characters are still counted"
+            )
+
+    async def close(self):
+        await self._transport.close()
+        if self._cache:
+            self._cache.close()
+
+    def _rate_limiter(self, model: str) -> AsyncRateLimiter:
+        if model not in self._rate_limiters:
+            self._rate_limiters[model] = AsyncRateLimiter(
+                self._rate, self._burst, name=f"llm:{model}"
+            )
+        return self._rate_limiters[model]
+
+    def _account(self, model: str, prompt_chars: int, usage: t.Any):
+        """Record what one answered request cost, from the API's `usage` field."""
+        self.usage["requests"] += 1
+        self.usage["prompt_chars"] += prompt_chars
+        LLM_PROMPT_CHARS.labels(model).inc(prompt_chars)
+        extra: dict[str, t.Any] = {"model": model, "prompt_chars": prompt_chars}
+        if not isinstance(usage, dict):
+            # Streamed answers stop at the closing brace, before the usage chunk.
+            self.usage["requests_without_usage"] += 1
+            extra["tokens"] = "unavailable"
+        else:
+            for kind in ("prompt", "completion"):
+                tokens = usage.get(f"{kind}_tokens")
+                if isinstance(tokens, int):
+                    self.usage[f"{kind}_tokens"] += tokens
+                    LLM_TOKENS.labels(model, kind).inc(tokens)
+                    extra[f"{kind}_tokens"] = tokens
+            if extra.get("prompt_tokens"):
+                extra["chars_per_token"] = round(
+                    prompt_chars / extra["prompt_tokens"], 2
+                )
+        logger.debug("Token usage", extra=extra)
 
-    def _extract_json_from_text(self, text: str) -> dict[str, t.Any]:
+    def _extract_json_from_text(self, text: str) -> dict[str, t.Any] | None:
         tmp_txt = text[:200] + "..." if len(text) > 200 else text
         logger.debug("Parsing model output", extra={"output": tmp_txt})
         try:
             return json.loads(text.strip())
         except json.JSONDecodeError:
             logger.warning("Direct JSON parse failed", extra={"output": tmp_txt})
-            return {"events": []}
+            return None
 
     async def _make_request(self, payload: dict[str, t.Any]) -> dict[str, t.Any] | None:
         headers = {
@@ -141,20 +780,42 @@ class OpenAICompatibleLLM:
         url = f"{self.BASE_URL}/chat/completions"
         body = json.dumps(payload).encode("utf-8")
 
-        def make_request():
-            http = httplib2.Http()
-            return http.request(url, method="POST", body=body, headers=headers)
-
-        await self._rate_limiter.acquire()
+        rate_limiter = self._rate_limiter(payload["model"])
+        await rate_limiter.acquire()
 
         try:
-            response, content = await asyncio.to_thread(make_request)
-            if response.status != 200:
+            if self._stream:
+                stream_payload = {
+                    **payload,
+                    "stream": True,
+                    "stream_options": {"include_usage": True},
+                }
+                body = json.dumps(stream_payload).encode("utf-8")
+                # Covers connecting and headers too; cleared by the first token,
+                # reasoning included.
+                async with asyncio.timeout(self._ttft_timeout) as deadline:
+                    async with self._transport.stream(
+                        "POST", url, body=body, headers=headers
+                    ) as resp:
+                        if resp.status == 200:
+                            return await self._read_stream(resp, deadline)
+                        status, resp_headers = resp.status, resp.headers
+                        content = await resp.read()
+            else:
+                status, resp_headers, content = await self._transport.request(
+                    "POST", url, body=body, headers=headers
+                )
+
+            if status != 200:
                 extra = {
-                    "status": response.status,
+                    "status": status,
                     "resp_body": content.decode("utf-8", errors="replace")[:999],
                 }
-                logger.warning(f"HTTP {response.status} - switching model", extra=extra)
+                if status in self.RETRY_STATUSES:
+                    delay = parse_retry_after(resp_headers.get("Retry-After"), 5.0)
+                    rate_limiter.defer(delay)
+                    extra["retry_after"] = delay
+                logger.warning(f"HTTP {status} - switching model", extra=extra)
                 return None
 
             try:
@@ -171,17 +832,83 @@ class OpenAICompatibleLLM:
 
             return data
 
+        except TimeoutError:
+            extra = {"model": payload["model"], "stream": self._stream}
+            logger.warning("Request timed out - switching model", extra=extra)
+            return None
         except Exception as e:
             extra = {"error": str(e), "error_type": type(e).__name__}
             logger.warning("Request failed - switching model", extra=extra)
             return None
 
+    async def _read_stream(
+        self, resp: aiohttp.ClientResponse, deadline: asyncio.Timeout
+    ) -> dict[str, t.Any] | None:
+        """Collect SSE content deltas, stopping once a JSON object is complete.
+
+        `deadline` is the time-to-first-token budget; it is cleared by the
+        first non-empty content or reasoning delta, not by role-only or
+        keep-alive chunks.
+        """
+        scanner = JsonObjectScanner()
+        parts: list[str] = []
+        usage = None
+        async for raw in resp.content:
+            line = raw.strip()
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+
+            chunk = json.loads(data)
+            if chunk.get("error"):
+                extra = {"error": chunk["error"]}
+                logger.warning("API error - switching model", extra=extra)
+                return None
+            # Only sent with the last chunk, which an early stop never reads.
+            usage = chunk.get("usage") or usage
+            for choice in chunk.get("choices") or ():
+                delta = choice.get("delta") or {}
+                text = delta.get("content") or ""
+                # Reasoning models think before answering; that is progress too.
+                thinking = any(delta.get(field) for field in self.REASONING_FIELDS)
+                if (text or thinking) and deadline.when() is not None:
+                    deadline.reschedule(None)
+                parts.append(text)
+                scanner.feed(text)
+            if scanner.complete:
+                break
+
+        content = "".join(parts)
+        if scanner.complete:
+            content = content[scanner.start : scanner.end]
+        return {"choices": [{"message": {"content": content}}], "usage": usage}
+
+    @staticmethod
+    def _normalize_events(events: t.Any) -> list[dict]:
+        normalized = []
+        for event in events if isinstance(events, list) else ():
+            if not isinstance(event, dict):
+                continue
+            date = event.get("date", "")
+            if "T" in date:
+                date = date.split("T", 1)[0]
+            summary = event.get("summary", "")
+            if date and summary:
+                normalized.append({"date": date, "summary": summary})
+        return normalized
+
+    def _parse_events(self, parsed: dict[str, t.Any]) -> list[dict]:
+        return self._normalize_events(parsed.get("events", []))
+
     async def _try_model(
         self,
         model: str,
         user_prompt: str,
-        sys_prompt: str | None = None,
-    ) -> list[dict] | None:
+        sys_prompt: str | None,
+        parse: t.Callable[[dict[str, t.Any]], t.Any],
+    ) -> t.Any:
         payload = {
             "model": model,
             "messages": [
@@ -195,6 +922,8 @@ class OpenAICompatibleLLM:
             data = await self._make_request(payload)
             if not data:
                 return None
+            prompt_chars = len(sys_prompt or "") + len(user_prompt)
+            self._account(model, prompt_chars, data.get("usage"))
 
             try:
                 output_text = data["choices"][0]["message"]["content"]
@@ -203,49 +932,420 @@ class OpenAICompatibleLLM:
                 return None
 
             parsed = self._extract_json_from_text(output_text)
-            events = parsed.get("events", [])
-            normalized = []
-            for event in events:
-                if not isinstance(event, dict):
-                    continue
-                date = event.get("date", "")
-                if "T" in date:
-                    date = date.split("T", 1)[0]
-                summary = event.get("summary", "")
-                if date and summary:
-                    normalized.append({"date": date, "summary": summary})
-
-            extra = {"model": model, "event_count": len(normalized)}
-            logger.debug("Successfully extracted events", extra=extra)
-            return normalized
+            if parsed is None:
+                # Not an answer: try the next model, and never cache it.
+                return None
+            result = parse(parsed)
+            logger.debug("Successfully parsed answer", extra={"model": model})
+            return result
 
         except Exception as e:
             logger.warning(f"Model {model} failed", extra={"error": str(e)})
             return None
 
+    def _start_attempt(
+        self,
+        model: str,
+        user_prompt: str,
+        sys_prompt: str | None,
+        parse: t.Callable[[dict[str, t.Any]], t.Any],
+    ) -> asyncio.Task:
+        async def attempt():
+            self._router.begin(model)
+            start = time.monotonic()
+            try:
+                result = await self._try_model(model, user_prompt, sys_prompt, parse)
+            except asyncio.CancelledError:
+                self._router.release(model)
+                raise
+            latency = time.monotonic() - start
+            self._router.record(model, result is not None, latency)
+            outcome = "ok" if result is not None else "fail"
+            LLM_REQUEST_SECONDS.labels(model, outcome).observe(latency)
+            return result
+
+        return asyncio.create_task(attempt())
+
+    async def _complete(
+        self,
+        user_prompt: str,
+        sys_prompt: str | None,
+        parse: t.Callable[[dict[str, t.Any]], t.Any],
+    ) -> t.Any:
+        """Walk the models in router order until one answers; None if all fail."""
+        models = self._router.order()
+        i = 0
+        while i < len(models):
+            model = models[i]
+            logger.debug(f"Attempting model {i + 1}/{len(models)}: {model}")
+            if i:
+                LLM_FALLBACKS.inc()
+            attempts = {
+                self._start_attempt(model, user_prompt, sys_prompt, parse): model
+            }
+            hedge_delay = None
+            if self._hedge and i + 1 < len(models):
+                hedge_delay = self._router.p95(model)
+            i += 1
+
+            done, _ = await asyncio.wait(attempts, timeout=hedge_delay)
+            if not done:
+                hedge_model = models[i]
+                extra = {"model": model, "hedge_model": hedge_model}
+                logger.debug("Model past p95 latency, hedging", extra=extra)
+                LLM_FALLBACKS.inc()
+                hedge = self._start_attempt(hedge_model, user_prompt, sys_prompt, parse)
+                attempts[hedge] = hedge_model
+                i += 1
+
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    if result is None:
+                        continue
+                    for loser in pending:
+                        loser.cancel()
+                    logger.info(f"Success with model: {attempts[task]}")
+                    return result
+
+        logger.error("All fallback models failed")
+        LLM_FAILURES.inc()
+        return None
+
+    def _cached(self, user_prompt: str, sys_prompt: str | None) -> list[dict] | None:
+        if not self._cache:
+            return None
+        cached = self._cache.get(self._cache.make_key(user_prompt, sys_prompt))
+        extra = {"hits": self._cache.hits, "misses": self._cache.misses}
+        if cached is not None:
+            logger.info("Extraction cache hit", extra=extra)
+        else:
+            logger.debug("Extraction cache miss", extra=extra)
+        return cached
+
+    def _remember(self, user_prompt: str, sys_prompt: str | None, result: list[dict]):
+        if self._cache:
+            self._cache.put(self._cache.make_key(user_prompt, sys_prompt), result)
+
     async def complete(
         self,
         user_prompt: str,
         sys_prompt: str | None = None,
     ) -> list[dict]:
-        for i, model in enumerate(self.FALLBACK_MODELS):
-            log_msg = f"Attempting model {i + 1}/{len(self.FALLBACK_MODELS)}: {model}"
-            logger.debug(log_msg)
-            result = await self._try_model(model, user_prompt, sys_prompt)
-            if result is not None:
-                extra = {"model": model, "event_count": len(result)}
-                logger.info(f"Success with model: {model}", extra=extra)
-                return result
+        cached = self._cached(user_prompt, sys_prompt)
+        if cached is not None:
+            return cached
+
+        result = await self._complete(user_prompt, sys_prompt, self._parse_events)
+        if result is None:
+            return []
+        logger.debug("Extracted events", extra={"event_count": len(result)})
+        self._remember(user_prompt, sys_prompt, result)
+        return result
+
+    async def complete_batch(
+        self,
+        user_prompts: list[str],
+        sys_prompt: str | None = None,
+    ) -> list[list[dict]] | None:
+        """Extract events from several messages sharing `sys_prompt` in one call.
+
+        Messages are tagged with their position in the list and the answer is
+        split back by tag. Returns None if the answer doesn't account for every
+        message exactly once, so the caller can retry them one by one.
+        """
+        results: list[list[dict] | None] = [
+            self._cached(p, sys_prompt) for p in user_prompts
+        ]
+        missing = {str(i): p for i, p in enumerate(user_prompts) if results[i] is None}
+        if len(missing) == 1:
+            [(idx, prompt)] = missing.items()
+            events_list = await self._complete(prompt, sys_prompt, self._parse_events)
+            if events_list is not None:
+                results[int(idx)] = events_list
+                self._remember(prompt, sys_prompt, events_list)
+        elif missing:
+            LLM_BATCH_SIZE.observe(len(missing))
+            batch_prompt = "\n\n".join(f"### {i}\n{p}" for i, p in missing.items())
+            answer = await self._complete(
+                batch_prompt, (sys_prompt or "") + BATCH_PROMPT_SUFFIX, lambda d: d
+            )
+            if answer is None:
+                return [r or [] for r in results]
+
+            # Models sometimes answer with a bare list or another JSON value.
+            items = answer.get("messages") if isinstance(answer, dict) else None
+            by_id = {}
+            for item in items if isinstance(items, list) else ():
+                if isinstance(item, dict) and isinstance(item.get("events"), list):
+                    by_id.setdefault(str(item.get("id", "")).lstrip("#"), []).append(
+                        item["events"]
+                    )
+            if set(by_id) != set(missing) or any(len(v) > 1 for v in by_id.values()):
+                extra = {"expected": sorted(missing), "got": sorted(by_id)}
+                logger.warning("Malformed batch answer", extra=extra)
+                LLM_BATCH_FALLBACKS.inc()
+                return None
 
-        logger.error("All fallback models failed")
-        return []
+            for idx, prompt in missing.items():
+                events_list = self._normalize_events(by_id[idx][0])
+                results[int(idx)] = events_list
+                self._remember(prompt, sys_prompt, events_list)
+            extra = {"batch_size": len(missing)}
+            logger.debug("Split batched answer", extra=extra)
+
+        return [r or [] for r in results]
+
+
+class BatchingLLM:
+    """Collects concurrent `complete` calls into one multi-message request.
+
+    Calls with the same system prompt are held for up to `max_wait` seconds or
+    until `max_batch` of them are waiting, then sent with `complete_batch`.
+    A malformed batched answer falls back to one `complete` call per message.
+    """
+
+    def __init__(
+        self, llm: OpenAICompatibleLLM, max_batch: int = 8, max_wait: float = 0.5
+    ):
+        self._llm = llm
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._pending: dict[str | None, list[tuple[str, asyncio.Future]]] = {}
+        self._timers: dict[str | None, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def close(self):
+        for key in list(self._pending):
+            self._flush(key)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._llm.close()
+
+    async def complete(
+        self,
+        user_prompt: str,
+        sys_prompt: str | None = None,
+    ) -> list[dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(sys_prompt, [])
+        batch.append((user_prompt, future))
+        if len(batch) >= self._max_batch:
+            self._flush(sys_prompt)
+        elif len(batch) == 1:
+            self._timers[sys_prompt] = loop.call_later(
+                self._max_wait, self._flush, sys_prompt
+            )
+        return await future
+
+    def _flush(self, sys_prompt: str | None):
+        timer = self._timers.pop(sys_prompt, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(sys_prompt, None)
+        if batch:
+            task = asyncio.create_task(self._run(sys_prompt, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, sys_prompt: str | None, batch: list[tuple[str, asyncio.Future]]
+    ):
+        # Callers cancelled while waiting (e.g. on shutdown) don't need an answer.
+        batch = [(prompt, future) for prompt, future in batch if not future.done()]
+        try:
+            results = await self._llm.complete_batch([p for p, _ in batch], sys_prompt)
+            if results is None:
+                results = await asyncio.gather(
+                    *(self._llm.complete(p, sys_prompt) for p, _ in batch)
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results, strict=True):
+            if not future.done():
+                future.set_result(result)
+
+
+class EventCache:
+    """Normalized event summaries by date, mirrored from the calendar.
+
+    A date's SummaryIndex is built on first use and then kept in step with
+    put/remove, so dedup doesn't rebuild it for every message.
+    """
+
+    def __init__(self):
+        self.sync_token: str | None = None
+        self.window_end: dt.date | None = None
+        self.synced_at = 0.0
+        self.loaded: set[dt.date] = set()
+        self._events: dict[str, tuple[list[dt.date], str]] = {}
+        self._by_date: dict[dt.date, dict[str, str]] = defaultdict(dict)
+        self._indexes: dict[dt.date, SummaryIndex] = {}
+
+    def reset(self):
+        self.sync_token = None
+        self.window_end = None
+        self.loaded.clear()
+        self._events.clear()
+        self._by_date.clear()
+        self._indexes.clear()
+
+    def put(self, event_id: str, dates: list[dt.date], summary: str):
+        self.remove(event_id)
+        self._events[event_id] = (dates, summary)
+        for day in dates:
+            self._by_date[day][event_id] = summary
+            if day in self._indexes:
+                self._indexes[day].add(summary)
+
+    def remove(self, event_id: str):
+        dates, summary = self._events.pop(event_id, ([], ""))
+        for day in dates:
+            by_id = self._by_date[day]
+            by_id.pop(event_id, None)
+            # Another event on the same date may share the summary.
+            if day in self._indexes and summary not in by_id.values():
+                self._indexes[day].discard(summary)
+
+    def summaries(self, day: dt.date) -> set[str]:
+        return set(self._by_date.get(day, {}).values())
+
+    def index(self, day: dt.date) -> "SummaryIndex":
+        if day not in self._indexes:
+            self._indexes[day] = SummaryIndex(self.summaries(day))
+        return self._indexes[day]
+
+
+class SummaryIndex:
+    """Per-date trigram index over normalized summaries.
+
+    Candidates are pruned only by upper bounds of SequenceMatcher.ratio()
+    (length and character multiset overlap), and survivors go through the
+    exact Calendar.is_similar check, so decisions match a full pairwise scan.
+    Trigram overlap just orders the shortlist so likely matches come first.
+    """
+
+    def __init__(self, summaries: t.Iterable[str] = (), threshold: float = 0.65):
+        self._threshold = threshold
+        self._summaries: list[str] = []
+        self._counts: list[Counter[str]] = []
+        self._lengths: list[tuple[int, int]] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        self._seen: dict[str, int] = {}
+        # Indices of discarded summaries; they stay in the postings and are
+        # skipped by find().
+        self._removed: set[int] = set()
+        for summary in summaries:
+            self.add(summary)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    @staticmethod
+    def _trigrams(summary: str) -> set[str]:
+        padded = f"  {summary} "
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, summary: str):
+        if summary in self._seen:
+            return
+        idx = len(self._summaries)
+        self._seen[summary] = idx
+        self._summaries.append(summary)
+        self._counts.append(Counter(summary))
+        bisect.insort(self._lengths, (len(summary), idx))
+        for gram in self._trigrams(summary):
+            self._postings[gram].append(idx)
+
+    def discard(self, summary: str):
+        idx = self._seen.pop(summary, None)
+        if idx is not None:
+            self._removed.add(idx)
+
+    def _length_band(self, length: int) -> list[int]:
+        th = self._threshold
+        lo = math.floor(length * th / (2 - th))
+        hi = math.ceil(length * (2 - th) / th) if th > 0 else math.inf
+        start = bisect.bisect_left(self._lengths, (lo, -1))
+        end = bisect.bisect_right(self._lengths, (hi, math.inf))
+        return [idx for _, idx in self._lengths[start:end]]
+
+    def _may_match(self, counts: Counter[str], length: int, idx: int) -> bool:
+        # Same bound and arithmetic as SequenceMatcher.quick_ratio().
+        total = length + len(self._summaries[idx])
+        if not total:
+            return True
+        other = self._counts[idx]
+        overlap = sum(min(n, other[c]) for c, n in counts.items() if c in other)
+        return 2.0 * overlap / total >= self._threshold
+
+    def find(self, summary: str) -> str | None:
+        """Return an indexed summary similar to `summary`, if there is one."""
+        band = self._length_band(len(summary))
+        if not band:
+            return None
+
+        in_band = set(band)
+        shared: Counter[int] = Counter()
+        for gram in self._trigrams(summary):
+            for idx in self._postings.get(gram, ()):
+                if idx in in_band:
+                    shared[idx] += 1
+        order = [idx for idx, _ in shared.most_common()]
+        order.extend(idx for idx in band if idx not in shared)
+
+        counts = Counter(summary)
+        for idx in order:
+            if idx in self._removed or not self._may_match(counts, len(summary), idx):
+                continue
+            candidate = self._summaries[idx]
+            if Calendar.is_similar(summary, candidate, self._threshold):
+                return candidate
+        return None
+
+
+class CalendarAPIError(Exception):
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Calendar API returned {status_code}: {body[:300]}")
+        self.status_code = status_code
+        self.body = body
+
+
+# (method, path relative to the calendar, query params, JSON body)
+CalendarCall = tuple[str, str, dict[str, t.Any] | None, dict | None]
 
 
 class Calendar:
     SCOPES = ("https://www.googleapis.com/auth/calendar.events",)
     S_ACCOUNT_FILE = "./credentials.json"
-
-    def __init__(self, cal_id: str | None):
+    # The v3 REST surface is stable, so there's no discovery document to fetch.
+    BASE_URL = "https://www.googleapis.com/calendar/v3"
+    BATCH_URL = "https://www.googleapis.com/batch/calendar/v3"
+    BATCH_LIMIT = 50
+    CACHE_WINDOW_DAYS = 60
+    CACHE_REFRESH_INTERVAL = 60.0
+    # Operation -> (requests per second, burst).
+    RATE_LIMITS = {"list": (5.0, 10), "insert": (2.0, 5)}
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    # Google answers quota exhaustion with 403 and one of these reasons.
+    RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+    MAX_RETRIES = 4
+    RETRY_BASE_DELAY = 0.5
+
+    def __init__(
+        self,
+        cal_id: str | None,
+        rate_limits: dict[str, tuple[float, int]] | None = None,
+        transport: HttpTransport | None = None,
+    ):
         assert cal_id
         self._cal_id = cal_id
         if not os.path.exists(self.S_ACCOUNT_FILE):
@@ -255,8 +1355,14 @@ class Calendar:
             self.S_ACCOUNT_FILE,
             scopes=self.SCOPES,
         )
-        self._client = self._build_service()
-        self._rate_limiter = AsyncRateLimiter()
+        self._token_lock = asyncio.Lock()
+        self._transport = transport or HttpTransport(total_timeout=30.0)
+        self._rate_limiters = {
+            op: AsyncRateLimiter(rate, burst, name=f"calendar:{op}")
+            for op, (rate, burst) in {**self.RATE_LIMITS, **(rate_limits or {})}.items()
+        }
+        self._cache = EventCache()
+        self._inflight: dict[t.Hashable, asyncio.Future] = {}
 
     @staticmethod
     def normalize_summary(summary: str) -> str:
@@ -266,64 +1372,468 @@ class Calendar:
     def is_similar(a: str, b: str, threshold: float = 0.65) -> bool:
         return difflib.SequenceMatcher(None, a, b).ratio() >= threshold
 
-    def _build_service(self):
-        return build("calendar", "v3", credentials=self._creds)
+    @staticmethod
+    def _event_dates(item: dict) -> list[dt.date]:
+        start, end = item.get("start", {}), item.get("end", {})
+        if "date" in start:
+            first = dt.date.fromisoformat(start["date"])
+            last = dt.date.fromisoformat(end.get("date", start["date"]))
+            days = max((last - first).days, 1)
+            return [first + dt.timedelta(days=i) for i in range(days)]
+        if "dateTime" in start:
+            start_dt = dt.datetime.fromisoformat(start["dateTime"])
+            return [start_dt.astimezone(dt.UTC).date()]
+        return []
 
-    async def _execute(self, req: HttpRequest) -> dict:
-        await self._rate_limiter.acquire()
+    async def close(self):
+        await self._transport.close()
+
+    async def _token(self) -> str:
+        # `valid` already allows for clock skew before the token's expiry.
+        if not self._creds.valid:
+            async with self._token_lock:
+                if not self._creds.valid:
+                    request = google_auth_httplib2.Request(httplib2.Http())
+                    await asyncio.to_thread(self._creds.refresh, request)
+                    logger.debug("Calendar token refreshed")
+        return self._creds.token
+
+    def _url_path(self, path: str, params: dict[str, t.Any] | None) -> str:
+        query = {k: v for k, v in (params or {}).items() if v is not None}
+        query = {
+            k: str(v).lower() if isinstance(v, bool) else v for k, v in query.items()
+        }
+        base_path = urllib.parse.urlsplit(self.BASE_URL).path
+        cal_id = urllib.parse.quote(self._cal_id, safe="")
+        url_path = f"{base_path}/calendars/{cal_id}/{path}"
+        if query:
+            url_path = f"{url_path}?{urllib.parse.urlencode(query)}"
+        return url_path
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, t.Any] | None = None,
+        body: dict | None = None,
+    ) -> tuple[int, t.Mapping[str, str], bytes]:
+        url = urllib.parse.urljoin(self.BASE_URL, self._url_path(path, params))
+        headers = {"Authorization": f"Bearer {await self._token()}"}
+        data = None
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            data = json.dumps(body).encode("utf-8")
+        return await self._transport.request(method, url, body=data, headers=headers)
+
+    async def _send_batch(
+        self, calls: list[CalendarCall]
+    ) -> tuple[t.Mapping[str, str], list[tuple[int, str]]]:
+        """Send calls as one multipart/mixed request; (status, body) per call."""
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for i, (method, path, params, body) in enumerate(calls):
+            lines = [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <item{i}>",
+                "",
+                f"{method} {self._url_path(path, params)} HTTP/1.1",
+            ]
+            if body is not None:
+                lines += ["Content-Type: application/json", "", json.dumps(body)]
+            else:
+                # The blank line ending the embedded request's headers.
+                lines.append("")
+            parts.append("\r\n".join(lines))
+        data = "\r\n".join([*parts, f"--{boundary}--", ""]).encode("utf-8")
+        headers = {
+            "Authorization": f"Bearer {await self._token()}",
+            "Content-Type": f"multipart/mixed; boundary={boundary}",
+        }
+        status, resp_headers, content = await self._transport.request(
+            "POST", self.BATCH_URL, body=data, headers=headers
+        )
+        if status != 200:
+            error = (status, content.decode("utf-8", "replace"))
+            return resp_headers, [error] * len(calls)
+
+        envelope = f"Content-Type: {resp_headers.get('Content-Type', '')}\r\n\r\n"
+        message = email.parser.BytesParser().parsebytes(envelope.encode() + content)
+        responses: dict[str, tuple[int, str]] = {}
+        for part in message.get_payload():
+            content_id = part.get("Content-ID", "").strip("<>")
+            http = part.get_payload(decode=True).decode("utf-8", "replace")
+            head, _, body = http.replace("\r\n", "\n").partition("\n\n")
+            responses[content_id.removeprefix("response-")] = (
+                int(head.split(None, 2)[1]),
+                body,
+            )
+        # A call missing from the answer is treated like a transient failure.
+        return resp_headers, [
+            responses.get(f"item{i}", (503, "missing from batch response"))
+            for i in range(len(calls))
+        ]
+
+    @classmethod
+    def _retryable(cls, status: int, body: str) -> bool:
+        if status in cls.RETRY_STATUSES:
+            return True
+        if status != 403:
+            return False
+        try:
+            errors = json.loads(body)["error"]["errors"]
+            return any(e.get("reason") in cls.RATE_LIMIT_REASONS for e in errors)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return False
 
-        def run():
-            http = google_auth_httplib2.AuthorizedHttp(
-                self._creds, http=httplib2.Http()
+    async def _backoff(
+        self,
+        op: str,
+        status: int | None,
+        headers: t.Mapping[str, str],
+        attempt: int,
+    ):
+        # Full jitter keeps concurrent retries from landing together.
+        backoff = random.uniform(0, self.RETRY_BASE_DELAY * 2**attempt)
+        delay = parse_retry_after(headers.get("Retry-After"), backoff)
+        # Only retryable 403s get here: rate limits, like 429.
+        if status in (403, 429, 503):
+            self._rate_limiters[op].defer(delay)
+        else:
+            await asyncio.sleep(delay)
+        extra = {"op": op, "status": status, "retry_after": round(delay, 3)}
+        logger.warning("Calendar API request failed, backing off", extra=extra)
+
+    async def _request(
+        self,
+        op: str,
+        method: str,
+        path: str,
+        params: dict[str, t.Any] | None = None,
+        body: dict | None = None,
+    ) -> dict:
+        rate_limiter = self._rate_limiters[op]
+        attempt = 0
+        reauthorized = False
+        while True:
+            await rate_limiter.acquire()
+            try:
+                with CALENDAR_REQUEST_SECONDS.labels(op).time():
+                    status, headers, content = await self._send(
+                        method, path, params, body
+                    )
+            except (aiohttp.ClientError, TimeoutError) as e:
+                if attempt >= self.MAX_RETRIES:
+                    raise
+                status, headers, content = None, {}, str(e).encode()
+
+            if status == 200:
+                return json.loads(content) if content else {}
+            if status == 401 and not reauthorized:
+                # Revoked or clock-skewed token: drop it and fetch a new one.
+                self._creds.token = None
+                reauthorized = True
+                continue
+            if status is not None:
+                text = content.decode("utf-8", "replace")
+                if not self._retryable(status, text) or attempt >= self.MAX_RETRIES:
+                    raise CalendarAPIError(status, text)
+
+            await self._backoff(op, status, headers, attempt)
+            attempt += 1
+
+    async def _batch(
+        self, op: str, calls: list[CalendarCall]
+    ) -> list[dict | Exception]:
+        """Run calls through the batch endpoint, retrying only the failed ones.
+
+        Returns a parsed body or the exception per call, in order. Google
+        counts every call in a batch against quota, so each takes its own
+        token from the `op` rate limiter.
+        """
+        if len(calls) == 1:
+            try:
+                return [await self._request(op, *calls[0])]
+            except Exception as e:
+                return [e]
+
+        results: list[dict | Exception | None] = [None] * len(calls)
+        pending = list(range(len(calls)))
+        attempt = 0
+        reauthorized = False
+        while pending:
+            retry: list[int] = []
+            unauthorized = transient = False
+            backoff_status: int | None = None
+            headers: t.Mapping[str, str] = {}
+            for start in range(0, len(pending), self.BATCH_LIMIT):
+                chunk = pending[start : start + self.BATCH_LIMIT]
+                await self._rate_limiters[op].acquire(len(chunk))
+                try:
+                    with CALENDAR_REQUEST_SECONDS.labels(f"{op}_batch").time():
+                        headers, responses = await self._send_batch(
+                            [calls[i] for i in chunk]
+                        )
+                except (aiohttp.ClientError, TimeoutError) as e:
+                    responses = [(0, str(e))] * len(chunk)
+
+                for i, (status, body) in zip(chunk, responses, strict=True):
+                    if status == 200:
+                        results[i] = json.loads(body) if body.strip() else {}
+                    elif status == 401 and not reauthorized:
+                        unauthorized = True
+                        retry.append(i)
+                    elif (
+                        status == 0 or self._retryable(status, body)
+                    ) and attempt < self.MAX_RETRIES:
+                        transient = True
+                        backoff_status = status or None
+                        retry.append(i)
+                    else:
+                        results[i] = CalendarAPIError(status, body)
+
+            if unauthorized:
+                self._creds.token = None
+                reauthorized = True
+            if transient:
+                await self._backoff(op, backoff_status, headers, attempt)
+                attempt += 1
+            pending = retry
+
+        return t.cast(list[dict | Exception], results)
+
+    async def _coalesced(self, key: t.Hashable, factory: t.Callable[[], t.Awaitable]):
+        """Share one in-flight call between all concurrent callers with same key."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def forget(done: asyncio.Future):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    async def _list_events(self, **params) -> tuple[list[dict], str | None]:
+        items: list[dict] = []
+        page_token = None
+        while True:
+            result = await self._request(
+                "list",
+                "GET",
+                "events",
+                params={**params, "pageToken": page_token, "maxResults": 2500},
             )
-            return req.execute(http=http)
+            items.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return items, result.get("nextSyncToken")
+
+    def _apply_event(self, item: dict):
+        event_id = item.get("id")
+        if not event_id:
+            return
+        if item.get("status") == "cancelled" or "summary" not in item:
+            self._cache.remove(event_id)
+            return
+        summary = self.normalize_summary(item["summary"])
+        self._cache.put(event_id, self._event_dates(item), summary)
+
+    async def _full_sync(self, window_end: dt.date):
+        today = dt.datetime.now(dt.UTC).date()
+        items, sync_token = await self._list_events(
+            timeMin=f"{today.isoformat()}T00:00:00Z",
+            timeMax=f"{window_end.isoformat()}T00:00:00Z",
+            singleEvents=True,
+        )
+        self._cache.reset()
+        for item in items:
+            self._apply_event(item)
+        days = (window_end - today).days
+        self._cache.loaded.update(today + dt.timedelta(days=i) for i in range(days))
+        self._cache.sync_token = sync_token
+        self._cache.window_end = window_end
+        extra = {"events": len(items), "days": days, "sync_token": bool(sync_token)}
+        logger.info("Calendar cache prefetched", extra=extra)
+
+    async def _incremental_sync(self):
+        try:
+            items, sync_token = await self._list_events(
+                syncToken=self._cache.sync_token,
+                singleEvents=True,
+            )
+        except CalendarAPIError as e:
+            if e.status_code != 410:
+                raise
+            logger.info("Calendar sync token expired, doing full sync")
+            assert self._cache.window_end
+            await self._full_sync(self._cache.window_end)
+            return
 
-        return await asyncio.to_thread(run)
+        for item in items:
+            self._apply_event(item)
+        self._cache.sync_token = sync_token or self._cache.sync_token
+        logger.debug("Calendar cache synced", extra={"changes": len(items)})
+
+    async def _sync_cache(self):
+        loop = asyncio.get_running_loop()
+        today = dt.datetime.now(dt.UTC).date()
+        window_end = today + dt.timedelta(days=self.CACHE_WINDOW_DAYS)
+        age = loop.time() - self._cache.synced_at
+        if self._cache.window_end != window_end:
+            await self._full_sync(window_end)
+        elif age < self.CACHE_REFRESH_INTERVAL:
+            return
+        elif self._cache.sync_token:
+            await self._incremental_sync()
+        else:
+            await self._full_sync(window_end)
+        self._cache.synced_at = loop.time()
 
-    async def get_existing_events(self, target_date: dt.datetime) -> set[str]:
+    async def prefetch(self):
         try:
-            date_str = target_date.date().isoformat()
-            next_date_str = (target_date.date() + dt.timedelta(days=1)).isoformat()
+            await self._coalesced("sync", self._sync_cache)
+        except Exception as e:
+            logger.warning("Calendar cache sync failed", exc_info=e)
 
-            req = self._client.events().list(
-                calendarId=self._cal_id,
-                timeMin=f"{date_str}T00:00:00Z",
-                timeMax=f"{next_date_str}T00:00:00Z",
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            result = await self._execute(req)
+    @staticmethod
+    def _day_params(day: dt.date) -> dict[str, t.Any]:
+        return {
+            "timeMin": f"{day.isoformat()}T00:00:00Z",
+            "timeMax": f"{(day + dt.timedelta(days=1)).isoformat()}T00:00:00Z",
+            "singleEvents": True,
+        }
 
-            existing_summaries = set()
-            for event in result.get("items", []):
-                if "summary" in event:
-                    normalized = self.normalize_summary(event["summary"])
-                    existing_summaries.add(normalized)
+    async def _fetch_date(self, day: dt.date):
+        items, _ = await self._list_events(**self._day_params(day))
+        for item in items:
+            self._apply_event(item)
+        self._cache.loaded.add(day)
 
-            extra = {
-                "date": date_str,
-                "count": len(existing_summaries),
-                "summaries": list(existing_summaries),
-            }
-            logger.debug("Found existing events for date", extra=extra)
-            return existing_summaries
+    async def _fetch_dates(self, days: list[dt.date]):
+        if len(days) == 1:
+            await self._fetch_date(days[0])
+            return
 
+        calls: list[CalendarCall] = [
+            ("GET", "events", {**self._day_params(d), "maxResults": 2500}, None)
+            for d in days
+        ]
+        results = await self._batch("list", calls)
+        for day, result in zip(days, results, strict=True):
+            if isinstance(result, Exception):
+                extra = {"date": day.isoformat()}
+                logger.warning(
+                    "Failed to fetch events for date", exc_info=result, extra=extra
+                )
+                continue
+            if result.get("nextPageToken"):
+                await self._fetch_date(day)
+                continue
+            for item in result.get("items", []):
+                self._apply_event(item)
+            self._cache.loaded.add(day)
+
+    async def _coalesced_many(
+        self,
+        keys: list[t.Hashable],
+        factory: t.Callable[[list], t.Awaitable],
+    ):
+        """Like `_coalesced`, but one call covers every key not yet in flight."""
+        new = [key for key in keys if key not in self._inflight]
+        if new:
+            task = asyncio.ensure_future(factory(new))
+            for key in new:
+                self._inflight[key] = task
+
+            def forget(done: asyncio.Future):
+                for key in new:
+                    if self._inflight.get(key) is done:
+                        del self._inflight[key]
+
+            task.add_done_callback(forget)
+        tasks = {self._inflight[key] for key in keys}
+        await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+
+    async def _load(self, days: list[dt.date]):
+        await self.prefetch()
+        missing = list(dict.fromkeys(d for d in days if d not in self._cache.loaded))
+        try:
+            if missing:
+                await self._coalesced_many(missing, self._fetch_dates)
         except Exception as e:
-            extra = {"date": target_date.date().isoformat()}
+            extra = {"dates": [d.isoformat() for d in missing]}
             logger.warning(
                 "Failed to fetch existing events, proceeding without deduplication",
                 exc_info=e,
                 extra=extra,
             )
-            return set()
 
-    async def _insert_event(self, ev: dict) -> str | None:
-        req = self._client.events().insert(calendarId=self._cal_id, body=ev)
-        result = await self._execute(req)
-        return result.get("htmlLink")
+    async def get_existing_events_many(
+        self, target_dates: list[dt.datetime]
+    ) -> list[set[str]]:
+        """Existing summaries per date, fetching uncached dates in one batch."""
+        days = [d.date() for d in target_dates]
+        await self._load(days)
+        results = []
+        for day in days:
+            existing_summaries = self._cache.summaries(day)
+            extra = {
+                "date": day.isoformat(),
+                "count": len(existing_summaries),
+                "summaries": list(existing_summaries),
+            }
+            logger.debug("Found existing events for date", extra=extra)
+            results.append(existing_summaries)
+        return results
 
-    async def publish(self, ev_date: dt.datetime, summary: str, link: str):
-        ev = {
+    async def get_existing_events(self, target_date: dt.datetime) -> set[str]:
+        [existing_summaries] = await self.get_existing_events_many([target_date])
+        return existing_summaries
+
+    async def summary_indexes_many(
+        self, target_dates: list[dt.datetime]
+    ) -> list[SummaryIndex]:
+        """Like get_existing_events_many, as per-date SummaryIndexes.
+
+        The indexes are shared and follow the calendar as events are synced
+        or published; callers must not add to them.
+        """
+        days = [d.date() for d in target_dates]
+        await self._load(days)
+        indexes = [self._cache.index(day) for day in days]
+        for day, index in zip(days, indexes, strict=True):
+            extra = {"date": day.isoformat(), "count": len(index)}
+            logger.debug("Found existing events for date", extra=extra)
+        return indexes
+
+    async def _insert_events(self, evs: list[dict]) -> list[str | None | Exception]:
+        # A client-side id makes retried inserts idempotent: if an earlier
+        # attempt went through but its response was lost, the API answers 409.
+        evs = [{"id": uuid.uuid4().hex, **ev} for ev in evs]
+        results = await self._batch(
+            "insert", [("POST", "events", None, ev) for ev in evs]
+        )
+
+        links: list[str | None | Exception] = []
+        for ev, result in zip(evs, results, strict=True):
+            if isinstance(result, CalendarAPIError) and result.status_code == 409:
+                try:
+                    result = await self._request("list", "GET", f"events/{ev['id']}")
+                except Exception as e:
+                    result = e
+            if isinstance(result, Exception):
+                links.append(result)
+                continue
+            self._apply_event(result)
+            links.append(result.get("htmlLink"))
+        return links
+
+    @staticmethod
+    def _event_body(ev_date: dt.datetime, summary: str, link: str) -> dict:
+        return {
             "summary": summary,
             "description": f"Source: {link}",
             "start": {"date": ev_date.date().isoformat(), "timeZone": "UTC"},
@@ -333,20 +1843,510 @@ class Calendar:
             },
         }
 
-        try:
-            return await self._insert_event(ev)
-        except Exception as e:
-            logger.warning(
-                "Calendar publish failed, rebuilding service and retrying",
-                exc_info=e,
-            )
+    async def publish_many(
+        self, events_list: list[tuple[dt.datetime, str, str]]
+    ) -> list[str | None | Exception]:
+        """Insert (date, summary, link) events, batching the API calls.
+
+        Returns the event link or the exception per event, in order, so one
+        rejected event doesn't fail the others.
+        """
+        return await self._insert_events([self._event_body(*ev) for ev in events_list])
+
+    async def publish(self, ev_date: dt.datetime, summary: str, link: str):
+        [result] = await self.publish_many([(ev_date, summary, link)])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class Checkpoints:
+    """SQLite store of per-channel progress and per-message outcomes.
+
+    Outcomes older than `max_age` seconds are pruned at startup and every
+    `PRUNE_EVERY` records; by then the channel watermark is past them.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str, max_age: float = 30 * 24 * 3600):
+        self._max_age = max_age
+        self._records = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS channels ("
+            " chat_id INTEGER PRIMARY KEY,"
+            " last_id INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " chat_id INTEGER NOT NULL,"
+            " msg_id INTEGER NOT NULL,"
+            " outcome TEXT NOT NULL,"
+            " updated REAL NOT NULL,"
+            " PRIMARY KEY (chat_id, msg_id))"
+        )
+        self._db.commit()
+        self.prune()
+
+    def last_id(self, chat_id: int) -> int | None:
+        row = self._db.execute(
+            "SELECT last_id FROM channels WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def advance(self, chat_id: int, msg_id: int):
+        self._db.execute(
+            "INSERT INTO channels VALUES (?, ?) ON CONFLICT (chat_id)"
+            " DO UPDATE SET last_id = max(last_id, excluded.last_id)",
+            (chat_id, msg_id),
+        )
+        self._db.commit()
+
+    def is_done(self, chat_id: int, msg_id: int) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM messages WHERE chat_id = ? AND msg_id = ?",
+            (chat_id, msg_id),
+        ).fetchone()
+        return row is not None
+
+    def record(self, chat_id: int, msg_id: int, outcome: str):
+        self._db.execute(
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)",
+            (chat_id, msg_id, outcome, time.time()),
+        )
+        self._db.commit()
+        self._records += 1
+        if self._records % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        cur = self._db.execute(
+            "DELETE FROM messages WHERE updated < ?", (time.time() - self._max_age,)
+        )
+        self._db.commit()
+        if cur.rowcount:
+            logger.info("Pruned message outcomes", extra={"count": cur.rowcount})
+
+    def close(self):
+        self._db.close()
+
+
+class TemporalPrefilter:
+    """Cheap regex check that a message mentions a date or time at all.
+
+    In "shadow" mode every message still goes to the LLM and misses are
+    logged; in "enforce" mode messages without any signal skip the LLM.
+    """
+
+    MODES = ("off", "shadow", "enforce")
+    # Whole words: a stem takes \w* only where no other word starts with it.
+    STEMS = (
+        # Russian
+        r"понедельник\w*|вторник\w*|сред[аеуы]|четверг\w*|пятниц\w*|суббот\w*"
+        r"|воскресень\w*|пн|вт|ср|чт|пт|сб|вс",
+        r"(?:январ|феврал|апрел|июн|июл|сентябр|октябр|ноябр|декабр)[ьяею]"
+        r"|март[аеу]?|ма[йяею]|август[аеу]?",
+        r"сегодня|завтра|послезавтра|выходн\w*|вечер(?:ом|а)?|утр(?:ом|а|о)",
+        # Serbian Cyrillic
+        r"понедељ\w*|уторак|уторк\w*|сред[аеуо]м?|четвртак|четвртк\w*|петак|петк\w*"
+        r"|субот\w*|недељ\w*",
+        r"јануар[ау]?|фебруар[ау]?|април[ау]?|мај[ау]?|јун[ау]?|јул[ау]?"
+        r"|септемб\w*|октоб\w*|новемб\w*|децемб\w*",
+        r"данас|сутра|прекосутра|викенд\w*|вечерас",
+        # Serbian Latin
+        r"ponedelj\w*|utorak|utork\w*|sred[aeuo]m?|[cč]etvrtak|[cč]etvrtk\w*"
+        r"|petak|petk\w*|subot\w*|nedelj\w*",
+        r"januar[au]?|februar[au]?|mart[au]?|april[au]?|maj[au]?|jun[au]?|jul[au]?"
+        r"|avgust[au]?|septemb\w*|oktob\w*|novemb\w*|decemb\w*",
+        r"danas|sutra|prekosutra|vikend\w*|ve[cč]eras",
+        # English; "may" alone is too common, it counts next to a day number.
+        r"mondays?|tuesdays?|wednesdays?|thursdays?|fridays?|saturdays?|sundays?",
+        r"january|february|march|april|june|july|august|september|october"
+        r"|november|december",
+        r"today|tonight|tomorrow|weekends?",
+    )
+    # Abbreviations that are also common words, accepted only in date context.
+    EN_MONTHS = r"jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec"
+    RU_MONTHS = r"янв|фев|мар|апр|июн|июл|авг|сент?|окт|нояб?|дек"
+    NUMERIC = (
+        r"\b\d{1,2}[./]\d{1,2}(?:[./]\d{2,4})?\b",  # 25.10, 25/10/2026
+        r"\b\d{4}-\d{2}-\d{2}\b",  # 2026-10-25
+        r"\b(?:[01]?\d|2[0-3]):[0-5]\d\b",  # 19:00
+        r"\b(?:1[0-2]|0?[1-9])(?::[0-5]\d)?\s?[ap]\.?m\b\.?",  # 7pm, 7:30 p.m.
+        # u 19h, в 19 ч, 19 часов, у 19 часова, u 19č, 19 sati
+        r"\b\d{1,2}\s?(?:h|ч|час(?:а|ов)?|сат[аи]?|часова|č|[cč]asova|sat[ai]?)\b",
+        rf"\b(?:{EN_MONTHS})\.?\s?\d{{1,2}}\b",  # Oct 25, Nov. 3
+        rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s?(?:of\s)?(?:{EN_MONTHS})\b",  # 25 Oct
+        rf"\b\d{{1,2}}\s?(?:{RU_MONTHS})\b",  # 25 окт, 5 дек.
+        r"\b(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:[.,]|\s\d)",  # Sat, 3
+    )
+    PATTERN = re.compile(
+        "|".join((rf"\b(?:{'|'.join(STEMS)})\b", *NUMERIC)),
+        re.IGNORECASE,
+    )
+
+    def __init__(self, mode: str = "off"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown prefilter mode: {mode}")
+        self.mode = mode
+        self.checked = 0
+        self.rejected = 0
+        self.saved = 0
+        self.missed = 0
+
+    def check(self, text: str) -> bool:
+        """Return False if the message has no temporal signal."""
+        if self.mode == "off":
+            return True
+        self.checked += 1
+        if self.PATTERN.search(text):
+            PREFILTER.labels("passed").inc()
+            return True
+        self.rejected += 1
+        PREFILTER.labels("rejected").inc()
+        if self.mode == "enforce":
+            self.saved += 1
+        return False
+
+    def observe(self, text: str, sender: str, events_list: list[dict]):
+        """Record what the LLM found for a message that check() rejected."""
+        if not events_list:
+            return
+        self.missed += 1
+        PREFILTER.labels("missed").inc()
+        extra = {
+            "sender": sender,
+            "text": text,
+            "data": events_list,
+            "rejected": self.rejected,
+            "missed": self.missed,
+        }
+        logger.warning("Prefilter rejected a message with events", extra=extra)
+
+
+_SPREAD_BYTE = [sum(1 << (16 * i) for i in range(8) if b >> i & 1) for b in range(256)]
+
 
+class NearDuplicateIndex:
+    """Time-windowed SimHash index of recently seen message texts.
+
+    A fingerprint is split into `max_distance + 1` bands; by pigeonhole,
+    any fingerprint within `max_distance` bits shares at least one band
+    exactly, so lookups only compare against those bucket members. Only
+    reposts from other chats count: a channel re-posting its own message is
+    usually correcting it.
+    """
+
+    BITS = 64
+    NOISE_RE = re.compile(r"(?:https?://|t\.me/)\S+|[@#]\w+")
+    NON_WORD_RE = re.compile(r"[^\w\s]+|_+")
+
+    def __init__(
+        self,
+        window: float = 24 * 3600,
+        max_distance: int = 3,
+        max_entries: int = 50_000,
+        min_features: int = 8,
+    ):
+        self._window = window
+        self._max_distance = max_distance
+        self._max_entries = max_entries
+        self._min_features = min_features
+        bands = max_distance + 1
+        width = self.BITS // bands
+        self._bands = [
+            (i * width, (1 << (width if i < bands - 1 else self.BITS - i * width)) - 1)
+            for i in range(bands)
+        ]
+        self._entries: OrderedDict[int, tuple[float, int, int, str]] = OrderedDict()
+        self._buckets: dict[tuple[int, int], set[int]] = defaultdict(set)
+        self._ids = itertools.count()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def features(cls, text: str) -> list[str]:
+        text = cls.NOISE_RE.sub(" ", text.casefold())
+        words = cls.NON_WORD_RE.sub(" ", text).split()
+        return words + [f"{a} {b}" for a, b in itertools.pairwise(words)]
+
+    @classmethod
+    def fingerprint(cls, features: t.Sequence[str]) -> int:
+        # Per-bit counters live in 16-bit lanes of one big int, so each
+        # feature costs 8 table lookups instead of 64 bit tests.
+        counts = 0
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            for i, byte in enumerate(reversed(digest)):
+                counts += _SPREAD_BYTE[byte] << (128 * i)
+        half = len(features) // 2
+        return sum(
+            1 << bit
+            for bit in range(cls.BITS)
+            if (counts >> (16 * bit)) & 0xFFFF > half
+        )
+
+    def _keys(self, fingerprint: int) -> list[tuple[int, int]]:
+        return [(shift, fingerprint >> shift & mask) for shift, mask in self._bands]
+
+    def _evict(self, now: float):
+        while self._entries:
+            entry_id, (seen_at, fingerprint, *_) = next(iter(self._entries.items()))
+            if (
+                now - seen_at <= self._window
+                and len(self._entries) <= self._max_entries
+            ):
+                break
+            del self._entries[entry_id]
+            for key in self._keys(fingerprint):
+                bucket = self._buckets[key]
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def check(self, text: str, label: str, chat_id: int) -> str | None:
+        """Return the label of a recent near-duplicate from another chat, or
+        remember this text."""
+        features = self.features(text)
+        if len(features) < self._min_features:
+            return None
+
+        now = time.monotonic()
+        self._evict(now)
+        fingerprint = self.fingerprint(features)
+        keys = self._keys(fingerprint)
+        candidates = set().union(*(self._buckets.get(key, ()) for key in keys))
+        for entry_id in candidates:
+            _, other, other_chat, other_label = self._entries[entry_id]
+            if other_chat == chat_id:
+                continue
+            if (fingerprint ^ other).bit_count() <= self._max_distance:
+                self.hits += 1
+                return other_label
+
+        entry_id = next(self._ids)
+        self._entries[entry_id] = (now, fingerprint, chat_id, label)
+        for key in keys:
+            self._buckets[key].add(entry_id)
+        return None
+
+
+class PromptCompactor:
+    """Shrinks message text before it is sent to the LLM.
+
+    Links and lines holding only hashtags or mentions are dropped, whitespace
+    and runs of emoji collapsed, and lines a channel repeated in at least
+    `footer_repeats` of its last `history` messages (footers, signatures,
+    ad blocks) removed. Lines with a date or time are always kept. Text still
+    over `max_chars` keeps the first sentence, shortened if need be, plus the
+    date-bearing sentences and their neighbours, with gaps marked by "…".
+    """
+
+    URL_RE = re.compile(r"(?:https?://|www\.|t\.me/)\S+")
+    TAG_LINE_RE = re.compile(r"(?:[#@]\w+[\s,.;|•·]*)+")
+    _EMOJI = "[\U0001f000-\U0001faff\u2600-\u27bf\u2b00-\u2bff]"
+    EMOJI_RUN_RE = re.compile(
+        rf"({_EMOJI})(?:[\ufe0f\u200d\U0001f3fb-\U0001f3ff]|\s*{_EMOJI})*"
+    )
+    SPACE_RE = re.compile(r"[^\S\n]+")
+    SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+
+    def __init__(
+        self, max_chars: int = 1500, footer_repeats: int = 3, history: int = 20
+    ):
+        self._max_chars = max_chars
+        self._footer_repeats = footer_repeats
+        self._history = history
+        self._seen: dict[t.Hashable, deque[frozenset[str]]] = defaultdict(deque)
+        self._counts: dict[t.Hashable, Counter[str]] = defaultdict(Counter)
+        self.chars_in = 0
+        self.chars_out = 0
+        self.footer_lines = 0
+
+    @classmethod
+    def clean(cls, line: str) -> str:
+        line = cls.URL_RE.sub(" ", line)
+        line = cls.EMOJI_RUN_RE.sub(r"\1", line)
+        return cls.SPACE_RE.sub(" ", line).strip()
+
+    def _learn(self, source: t.Hashable, keys: frozenset[str]):
+        seen, counts = self._seen[source], self._counts[source]
+        seen.append(keys)
+        counts.update(keys)
+        if len(seen) > self._history:
+            counts.subtract(seen.popleft())
+            for key in [k for k, n in counts.items() if n <= 0]:
+                del counts[key]
+
+    def _truncate(self, lines: list[str]) -> str:
+        sentences = [s for line in lines for s in self.SENTENCE_RE.split(line) if s]
+        dated = [
+            i for i, s in enumerate(sentences) if TemporalPrefilter.PATTERN.search(s)
+        ]
+        around = [j for i in dated for j in (i - 1, i + 1)]
+        chosen: dict[int, str] = {}
+        room = self._max_chars
+        for i in [0, *dated, *around, *range(len(sentences))]:
+            if i in chosen or not 0 <= i < len(sentences):
+                continue
+            sentence = sentences[i]
+            if len(sentence) >= room:
+                if i == 0:
+                    # The start is always kept; half the room stays for dates.
+                    later = any(j != 0 for j in dated)
+                    sentence = sentence[: (room // 2 if later else room) - 1] + "…"
+                elif i not in dated or room < 80:
+                    continue
+                else:
+                    sentence = sentence[: room - 1] + "…"
+            chosen[i] = sentence
+            room -= len(sentence) + 1
+
+        parts, prev = [], -1
+        for i in sorted(chosen):
+            if i != prev + 1:
+                parts.append("…")
+            parts.append(chosen[i])
+            prev = i
+        if prev != len(sentences) - 1:
+            parts.append("…")
+        return "\n".join(parts)
+
+    def compact(self, text: str, source: t.Hashable) -> str:
+        """Compact `text` and learn its repeated lines under `source`."""
+        lines, dated = [], set()
+        for raw in text.splitlines():
+            line = self.clean(raw)
+            if not line or self.TAG_LINE_RE.fullmatch(line):
+                continue
+            if TemporalPrefilter.PATTERN.search(line):
+                dated.add(len(lines))
+            lines.append(line)
+
+        counts = self._counts[source]
+        kept = [
+            line
+            for i, line in enumerate(lines)
+            if i in dated or counts[line.casefold()] < self._footer_repeats
+        ]
+        self.footer_lines += len(lines) - len(kept)
+        self._learn(
+            source,
+            frozenset(
+                line.casefold() for i, line in enumerate(lines) if i not in dated
+            ),
+        )
+        # A message made only of known boilerplate is still worth a look.
+        kept = kept or lines
+
+        compacted = "\n".join(kept)
+        if len(compacted) > self._max_chars:
+            compacted = self._truncate(kept)
+        self.chars_in += len(text)
+        self.chars_out += len(compacted)
+        PROMPT_CHARS.labels("raw").inc(len(text))
+        PROMPT_CHARS.labels("compacted").inc(len(compacted))
+        return compacted
+
+
+class Stage:
+    """Bounded queue drained by a fixed pool of worker tasks.
+
+    Items that overflow the queue or whose worker raises are handed to
+    `on_abandon(item, reason)` with reason "dropped" or "error".
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop_new", "drop_oldest")
+
+    def __init__(
+        self,
+        name: str,
+        worker: t.Callable[[t.Any], t.Awaitable[None]],
+        workers: int = 1,
+        maxsize: int = 100,
+        overflow: str = "block",
+        on_abandon: t.Callable[[t.Any, str], None] | None = None,
+    ):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.name = name
+        self.overflow = overflow
+        self.dropped = 0
+        self._worker = worker
+        self._worker_count = workers
+        self._on_abandon = on_abandon
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._tasks: list[asyncio.Task] = []
+        self._seconds = STAGE_SECONDS.labels(name)
+        self._inflight = STAGE_INFLIGHT.labels(name)
+        STAGE_QUEUE.labels(name).set_function(self._queue.qsize)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"{self.name}-{i}")
+            for i in range(self._worker_count)
+        ]
+
+    async def put(self, item: t.Any, block: bool = False):
+        if block or self.overflow == "block":
+            await self._queue.put(item)
+            return
+
+        if self._queue.full():
+            self.dropped += 1
+            STAGE_DROPPED.labels(self.name).inc()
+            extra = {"stage": self.name, "dropped": self.dropped}
+            logger.warning("Stage queue full, dropping item", extra=extra)
+            if self.overflow == "drop_new":
+                self._abandon(item, "dropped")
+                return
+            self._abandon(self._queue.get_nowait(), "dropped")
+            self._queue.task_done()
+        self._queue.put_nowait(item)
+
+    def _abandon(self, item: t.Any, reason: str):
+        if self._on_abandon:
             try:
-                self._client = self._build_service()
-                return await self._insert_event(ev)
-            except Exception as retry_e:
-                logger.error("Calendar publish error after retry", exc_info=retry_e)
-                raise
+                self._on_abandon(item, reason)
+            except Exception as e:
+                extra = {"stage": self.name, "reason": reason}
+                logger.error("Stage abandon callback error", exc_info=e, extra=extra)
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                with self._seconds.time(), self._inflight.track_inprogress():
+                    await self._worker(item)
+            except Exception as e:
+                logger.error(
+                    "Stage worker error", exc_info=e, extra={"stage": self.name}
+                )
+                self._abandon(item, "error")
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float):
+        try:
+            # join() returns without suspending when idle, so 0 is a valid timeout.
+            async with asyncio.timeout(timeout):
+                await self._queue.join()
+        except TimeoutError:
+            extra = {"stage": self.name, "pending": self._queue.qsize()}
+            logger.warning("Stage drain timed out", extra=extra)
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
 
 
 def make_prompt(date: dt.datetime) -> str:
@@ -359,42 +2359,202 @@ def make_prompt(date: dt.datetime) -> str:
     )
 
 
+class EntityCache:
+    """JSON file mapping t.me URLs to resolved input peers."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._peers: dict[str, dict[str, t.Any]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._peers = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable entity cache", exc_info=e)
+
+    def get(self, url: str) -> types.TypeInputPeer | None:
+        entry = self._peers.get(url)
+        try:
+            match entry:
+                case {"type": "channel"}:
+                    return types.InputPeerChannel(entry["id"], entry["access_hash"])
+                case {"type": "user"}:
+                    return types.InputPeerUser(entry["id"], entry["access_hash"])
+                case {"type": "chat"}:
+                    return types.InputPeerChat(entry["id"])
+        except (KeyError, TypeError):
+            pass
+        return None
+
+    def put(self, url: str, entity: t.Any):
+        peer = tg_utils.get_input_peer(entity)
+        if isinstance(peer, types.InputPeerChannel):
+            entry = {"type": "channel", "id": peer.channel_id}
+            entry["access_hash"] = peer.access_hash
+        elif isinstance(peer, types.InputPeerUser):
+            entry = {"type": "user", "id": peer.user_id}
+            entry["access_hash"] = peer.access_hash
+        elif isinstance(peer, types.InputPeerChat):
+            entry = {"type": "chat", "id": peer.chat_id}
+        else:
+            return
+        self._peers[url] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._peers, f, indent=1)
+        os.replace(tmp_path, self._path)
+
+
+async def resolve_entities(
+    tg: TelegramClient,
+    urls: t.Sequence[str],
+    cache: EntityCache | None = None,
+    concurrency: int = 8,
+) -> list[t.Any]:
+    entities: dict[str, t.Any] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(target: t.Any):
+        async with semaphore:
+            return await tg.get_entity(target)
+
+    cached = {url: peer for url in urls if cache and (peer := cache.get(url))}
+    if cached:
+        # One batched GetChannels/GetUsers call validates every cached peer.
+        try:
+            resolved = await tg.get_entity(list(cached.values()))
+            entities.update(zip(cached, resolved, strict=True))
+        except Exception as e:
+            # One stale peer fails the whole batch; find it by checking each
+            # peer (cheap by id) so only it needs a username resolve.
+            logger.warning("Cached entities batch failed, checking each", exc_info=e)
+            checked = await asyncio.gather(
+                *(resolve(peer) for peer in cached.values()), return_exceptions=True
+            )
+            for url, entity in zip(cached, checked, strict=True):
+                if isinstance(entity, Exception):
+                    extra = {"url": url, "error": str(entity)}
+                    logger.warning("Cached entity is invalid", extra=extra)
+                else:
+                    entities[url] = entity
+
+    missing = [url for url in urls if url not in entities]
+    resolved = await asyncio.gather(*(resolve(url) for url in missing))
+    entities.update(zip(missing, resolved, strict=True))
+    if cache and missing:
+        for url in missing:
+            cache.put(url, entities[url])
+        cache.save()
+
+    extra = {"cached": len(urls) - len(missing), "resolved": len(missing)}
+    logger.info("Resolved channel entities", extra=extra)
+    return [entities[url] for url in urls]
+
+
 async def setup_bot(
     tg: TelegramClient,
-    llm: OpenAICompatibleLLM,
+    llm: OpenAICompatibleLLM | BatchingLLM,
     calendar: Calendar,
     dst: str,
     src: tuple[str, ...],
+    stages: dict[str, dict[str, t.Any]] | None = None,
+    drain_timeout: float = 30.0,
+    prefilter: TemporalPrefilter | None = None,
+    checkpoints: Checkpoints | None = None,
+    backfill_limit: int = 0,
+    backfill_concurrency: int = 4,
+    entity_cache: EntityCache | None = None,
+    resolve_concurrency: int = 8,
+    near_dups: NearDuplicateIndex | None = None,
+    compactor: PromptCompactor | None = None,
 ):
-    dest_entity = await tg.get_entity(dst)
+    prefilter = prefilter or TemporalPrefilter()
+    # Message ids accepted by intake and not finished yet, per chat.
+    pending: dict[int, set[int]] = defaultdict(set)
+    # Message ids that failed for a possibly temporary reason, per chat; the
+    # watermark stays below them so backfill retries them after a restart.
+    failed: dict[int, set[int]] = defaultdict(set)
+    backfilling: set[int] = set()
+
+    def finish(message: Message, outcome: str):
+        MESSAGES.labels(outcome).inc()
+        chat_id = message.chat_id
+        in_flight = pending[chat_id]
+        in_flight.discard(message.id)
+        if not in_flight:
+            del pending[chat_id]
+        if not checkpoints:
+            return
+        if outcome in RETRY_OUTCOMES:
+            failed[chat_id].add(message.id)
+        else:
+            checkpoints.record(chat_id, message.id, outcome)
+        # Messages finish out of order: the watermark only passes ids that are
+        # all finished, and stays put while backfill may still fill gaps below.
+        if chat_id not in backfilling:
+            held = in_flight | failed.get(chat_id, set())
+            upto = min(held, default=message.id + 1) - 1
+            checkpoints.advance(chat_id, min(upto, message.id))
+
+    _, (dest_entity, *source_entities) = await asyncio.gather(
+        calendar.prefetch(),
+        resolve_entities(tg, (dst, *src), entity_cache, resolve_concurrency),
+    )
     dest_username = getattr(dest_entity, "username", "")
-    source_entities = []
-    for source in src:
-        s_ent = await tg.get_entity(source)
-        source_entities.append(s_ent)
+    for source, s_ent in zip(src, source_entities, strict=True):
         logger.info(f"Listening to: {getattr(s_ent, 'title', source)}")
 
-    @tg.on(events.NewMessage(chats=source_entities))
-    async def handler(event: events.NewMessage.Event):
-        message: Message = event.message
+    async def extract(message: Message):
         text = message.message
-        if not text or not text.strip():
-            return
-
         sender = await message.get_sender()
         sender_name = getattr(sender, "username", None)
         sender_name = sender_name or getattr(sender, "title", "Unknown")
 
         logger.info("Processing", extra={"sender": sender_name, "text": text})
 
+        if near_dups:
+            label = f"{sender_name}/{message.id}"
+            original = near_dups.check(text, label, message.chat_id)
+            if original:
+                extra = {"sender": sender_name, "original": original}
+                logger.info("Near-duplicate of a recent message, skipping", extra=extra)
+                finish(message, "near_duplicate")
+                return
+
+        has_signal = prefilter.check(text)
+        if not has_signal and prefilter.mode == "enforce":
+            extra = {"sender": sender_name, "saved": prefilter.saved}
+            logger.info("No date or time in message, skipping LLM", extra=extra)
+            finish(message, "prefiltered")
+            return
+
+        user_prompt = text
+        if compactor:
+            user_prompt = compactor.compact(text, message.chat_id)
+            extra = {"raw_chars": len(text), "chars": len(user_prompt)}
+            logger.debug("Compacted message", extra=extra)
+            if not user_prompt:
+                logger.info("Only links and tags in message, skipping LLM", extra=extra)
+                finish(message, "compacted_empty")
+                return
+
         prompt = make_prompt(message.date or dt.datetime.now())
-        events_list = await llm.complete(text, prompt)
+        with OPERATION_SECONDS.labels("llm_complete").time():
+            events_list = await llm.complete(user_prompt, prompt)
+        if not has_signal:
+            prefilter.observe(text, sender_name, events_list)
 
         if not events_list:
             logger.info("No events found", extra={"sender": sender_name})
+            finish(message, "no_events")
             return
 
         logger.info("Extracted", extra={"count": len(events_list), "data": events_list})
+        EVENTS_EXTRACTED.inc(len(events_list))
 
         events_by_date = defaultdict(list)
         for ev in events_list:
@@ -406,49 +2566,172 @@ async def setup_bot(
                 logger.error("Invalid event date format", exc_info=e, extra=extra)
                 continue
 
+        await dedup_stage.put((message, sender_name, events_by_date))
+
+    async def dedup(job: tuple[Message, str, dict[dt.datetime, list[dict]]]):
+        message, sender_name, events_by_date = job
         dates = list(events_by_date.keys())
-        summaries_per_date = await asyncio.gather(
-            *(calendar.get_existing_events(d) for d in dates)
-        )
+        with OPERATION_SECONDS.labels("calendar_lookup").time():
+            indexes = await calendar.summary_indexes_many(dates)
 
         all_unique_events = []
-        for ev_date, existing_summaries in zip(dates, summaries_per_date, strict=True):
+        for ev_date, existing in zip(dates, indexes, strict=True):
+            # The message's own events are checked against each other
+            # separately, so unpublished ones never enter the shared index.
+            accepted = SummaryIndex()
             for ev in events_by_date[ev_date]:
                 normalized_summary = calendar.normalize_summary(ev["summary"])
-                is_dup = any(
-                    calendar.is_similar(normalized_summary, s)
-                    for s in existing_summaries
-                )
-                if not is_dup:
+                if (
+                    existing.find(normalized_summary) is None
+                    and accepted.find(normalized_summary) is None
+                ):
                     all_unique_events.append((ev_date, ev))
-                    existing_summaries.add(normalized_summary)
+                    accepted.add(normalized_summary)
+                else:
+                    DEDUP_HITS.inc()
 
         if not all_unique_events:
             logger.info("No new events after dedup", extra={"sender": sender_name})
+            finish(message, "duplicate")
             return
 
+        await publish_stage.put((message, all_unique_events))
+
+    async def publish(job: tuple[Message, list[tuple[dt.datetime, dict]]]):
+        message, all_unique_events = job
         try:
-            forwarded = await message.forward_to(dest_entity)
+            with OPERATION_SECONDS.labels("forward").time():
+                forwarded = await message.forward_to(dest_entity)
             if not forwarded:
                 raise RuntimeError("Message was not forwarded")
             link = f"https://t.me/{dest_username}/{forwarded.id}"
         except Exception as e:
             logger.error("Forward message error", exc_info=e)
+            finish(message, "forward_failed")
             return
 
-        async def publish_one(ev_date, ev):
-            try:
-                summary = ev["summary"]
-                cal_link = await calendar.publish(ev_date, summary, link)
-                extra = {"summary": summary, "date": ev["date"], "link": cal_link}
-                logger.info("Calendar publish success", extra=extra)
-            except Exception as e:
-                logger.error("Calendar publish error", exc_info=e, extra={"event": ev})
+        with OPERATION_SECONDS.labels("calendar_publish").time():
+            results = await calendar.publish_many(
+                [(d, ev["summary"], link) for d, ev in all_unique_events]
+            )
+        for (_, ev), result in zip(all_unique_events, results, strict=True):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Calendar publish error", exc_info=result, extra={"event": ev}
+                )
+                continue
+            extra = {"summary": ev["summary"], "date": ev["date"], "link": result}
+            logger.info("Calendar publish success", extra=extra)
+        finish(message, "published")
+
+    def abandon(item: Message | tuple, reason: str):
+        # Extract items are messages; later stages carry the message first.
+        finish(item[0] if isinstance(item, tuple) else item, reason)
 
-        await asyncio.gather(*(publish_one(d, ev) for d, ev in all_unique_events))
+    stage_config = {**PIPELINE_STAGES, **(stages or {})}
+    extract_stage = Stage(
+        "extract", extract, **stage_config["extract"], on_abandon=abandon
+    )
+    dedup_stage = Stage("dedup", dedup, **stage_config["dedup"], on_abandon=abandon)
+    publish_stage = Stage(
+        "publish", publish, **stage_config["publish"], on_abandon=abandon
+    )
+    pipeline = (extract_stage, dedup_stage, publish_stage)
+    for stage in pipeline:
+        stage.start()
+
+    async def intake(message: Message, block: bool = False):
+        text = message.message
+        if not text or not text.strip():
+            return
+
+        key = (message.chat_id, message.id)
+        if message.id in pending.get(message.chat_id, ()) or (
+            checkpoints and checkpoints.is_done(*key)
+        ):
+            logger.debug("Message already processed", extra={"key": key})
+            return
+        pending[message.chat_id].add(message.id)
+        MESSAGES_RECEIVED.inc()
+        await extract_stage.put(message, block=block)
+
+    @tg.on(events.NewMessage(chats=source_entities))
+    async def handler(event: events.NewMessage.Event):
+        await intake(event.message)
+
+    async def backfill_one(
+        entity, chat_id: int, last_id: int | None, semaphore: asyncio.Semaphore
+    ):
+        try:
+            async with semaphore:
+                title = getattr(entity, "title", None)
+                if last_id is None:
+                    # No history yet: start tracking from the current tip.
+                    latest = await tg.get_messages(entity, limit=1)
+                    if latest:
+                        checkpoints.advance(chat_id, latest[0].id)
+                    return
+
+                count = 0
+                async for message in tg.iter_messages(
+                    entity, min_id=last_id, reverse=True, limit=backfill_limit
+                ):
+                    await intake(message, block=True)
+                    count += 1
+                if count:
+                    extra = {"channel": title, "count": count, "from_id": last_id}
+                    logger.info("Backfilled missed messages", extra=extra)
+        finally:
+            backfilling.discard(chat_id)
+
+    async def backfill():
+        assert checkpoints
+        # Read every starting point before any channel waits for the semaphore,
+        # so live messages finishing meanwhile can't move them past a gap.
+        chat_ids = [tg_utils.get_peer_id(e) for e in source_entities]
+        starts = [checkpoints.last_id(chat_id) for chat_id in chat_ids]
+        backfilling.update(chat_ids)
+        semaphore = asyncio.Semaphore(backfill_concurrency)
+        results = await asyncio.gather(
+            *(
+                backfill_one(e, chat_id, last_id, semaphore)
+                for e, chat_id, last_id in zip(
+                    source_entities, chat_ids, starts, strict=True
+                )
+            ),
+            return_exceptions=True,
+        )
+        for entity, result in zip(source_entities, results, strict=True):
+            if isinstance(result, Exception):
+                extra = {"channel": getattr(entity, "title", None)}
+                logger.error("Backfill failed", exc_info=result, extra=extra)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    backfill_task = None
+    if checkpoints and backfill_limit > 0:
+        backfill_task = asyncio.create_task(backfill())
 
     logger.info("Bot started and listening...")
-    await t.cast(t.Any, tg.run_until_disconnected())
+    disconnected = asyncio.ensure_future(tg.run_until_disconnected())
+    stopped = asyncio.ensure_future(stop.wait())
+    await asyncio.wait((disconnected, stopped), return_when=asyncio.FIRST_COMPLETED)
+    stopped.cancel()
+
+    logger.info("Shutting down, draining pipeline...")
+    tg.remove_event_handler(handler)
+    if backfill_task:
+        backfill_task.cancel()
+        await asyncio.gather(backfill_task, return_exceptions=True)
+    # Upstream stages first, so their output still reaches downstream queues.
+    # One deadline for all of them keeps shutdown within the stop grace period.
+    deadline = loop.time() + drain_timeout
+    for stage in pipeline:
+        await stage.drain(max(deadline - loop.time(), 0))
+    disconnected.cancel()
 
 
 async def main():
@@ -461,49 +2744,144 @@ async def main():
     api_hash = os.getenv("TG_API_HASH")
     assert api_hash
 
-    calendar = Calendar(cal_id)
-    llm = OpenAICompatibleLLM(api_key)
-    session = StringSession(session_str)
+    metrics_port = int(os.getenv("METRICS_PORT", "9100"))
+    if metrics_port:
+        prom.start_http_server(metrics_port, os.getenv("METRICS_ADDR", "0.0.0.0"))
 
-    async with TelegramClient(session, int(api_id), api_hash) as tg:
-        await setup_bot(
-            tg,
-            llm,
-            calendar,
-            dst="https://t.me/belgrade_aggregated",
-            src=(
-                "https://t.me/m2Rb4gv9J8J5",
-                "https://t.me/CaoBeograd",
-                "https://t.me/Serbia",
-                "https://t.me/SerbiaInMyMind",
-                "https://t.me/adaptacija",
-                "https://t.me/afisha_rs",
-                "https://t.me/airsoft_serbia",
-                "https://t.me/balkanoutdoor",
-                "https://t.me/beogradske_vesti",
-                "https://t.me/cofeek_vezde",
-                "https://t.me/debaty_belgrad",
-                "https://t.me/dobardabar_books",
-                "https://t.me/go_tara",
-                "https://t.me/ikonamitakikonami",
-                "https://t.me/kikirikirs",
-                "https://t.me/legiongamesrs",
-                "https://t.me/lepopishem",
-                "https://t.me/mapamagrus",
-                "https://t.me/obitaniya_sreda",
-                "https://t.me/poker_belgrade",
-                "https://t.me/sta_imas_beograd",
-                "https://t.me/standup_beo",
-                "https://t.me/tech_illumination",
-                "https://t.me/volna_srbjia",
-                "https://t.me/vstrechi_v_belgrade",
-                "https://t.me/zarko_tusic",
-                "https://t.me/noda_space",
-                "https://t.me/xecut_bg",
-                "https://t.me/neka_beograd",
-                "https://t.me/technoblok77",
+    calendar = Calendar(
+        cal_id,
+        rate_limits={
+            "list": (
+                float(os.getenv("CALENDAR_LIST_RATE", "5")),
+                int(os.getenv("CALENDAR_LIST_BURST", "10")),
+            ),
+            "insert": (
+                float(os.getenv("CALENDAR_INSERT_RATE", "2")),
+                int(os.getenv("CALENDAR_INSERT_BURST", "5")),
             ),
+        },
+        transport=HttpTransport(
+            max_connections=int(os.getenv("CALENDAR_MAX_CONNECTIONS", "4")),
+            total_timeout=float(os.getenv("CALENDAR_TIMEOUT", "30")),
+        ),
+    )
+    transport = HttpTransport(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "8")),
+        connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+        total_timeout=float(os.getenv("LLM_TIMEOUT", "120")),
+    )
+    cache = ExtractionCache(
+        os.getenv("LLM_CACHE_PATH", "./data/llm_cache.sqlite3"),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000")),
+        max_age=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "14")) * 24 * 3600,
+    )
+    router = ModelRouter(
+        OpenAICompatibleLLM.FALLBACK_MODELS,
+        failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURES", "3")),
+        cooldown=float(os.getenv("LLM_CIRCUIT_COOLDOWN", "60")),
+    )
+    near_dups = None
+    near_dup_hours = float(os.getenv("NEAR_DUP_WINDOW_HOURS", "24"))
+    if near_dup_hours > 0:
+        near_dups = NearDuplicateIndex(
+            window=near_dup_hours * 3600,
+            max_distance=int(os.getenv("NEAR_DUP_DISTANCE", "3")),
+            max_entries=int(os.getenv("NEAR_DUP_MAX_ENTRIES", "50000")),
+        )
+    compactor = None
+    if os.getenv("PROMPT_COMPACT", "1") == "1":
+        compactor = PromptCompactor(
+            max_chars=int(os.getenv("PROMPT_MAX_CHARS", "1500")),
+            footer_repeats=int(os.getenv("PROMPT_FOOTER_REPEATS", "3")),
+            history=int(os.getenv("PROMPT_FOOTER_HISTORY", "20")),
+        )
+    checkpoints = Checkpoints(
+        os.getenv("STATE_PATH", "./data/state.sqlite3"),
+        max_age=float(os.getenv("STATE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+    )
+    llm: OpenAICompatibleLLM | BatchingLLM = OpenAICompatibleLLM(
+        api_key,
+        transport,
+        cache,
+        router=router,
+        hedge=os.getenv("LLM_HEDGE", "") == "1",
+        rate=float(os.getenv("LLM_RATE", "1")),
+        burst=int(os.getenv("LLM_BURST", "3")),
+        stream=os.getenv("LLM_STREAM", "") == "1",
+        ttft_timeout=float(os.getenv("LLM_TTFT_TIMEOUT", "15")),
+    )
+    batch_size = int(os.getenv("LLM_BATCH_SIZE", "1"))
+    if batch_size > 1:
+        llm = BatchingLLM(
+            llm, batch_size, max_wait=float(os.getenv("LLM_BATCH_WAIT", "0.5"))
         )
+    session = StringSession(session_str)
+    stages = {
+        name: {
+            "workers": int(os.getenv(f"{name.upper()}_WORKERS", cfg["workers"])),
+            "maxsize": int(os.getenv(f"{name.upper()}_QUEUE_SIZE", cfg["maxsize"])),
+            "overflow": os.getenv(f"{name.upper()}_OVERFLOW", cfg["overflow"]),
+        }
+        for name, cfg in PIPELINE_STAGES.items()
+    }
+    # Each extract worker holds one message, so fewer workers cap the batch size.
+    stages["extract"]["workers"] = max(stages["extract"]["workers"], batch_size)
+
+    try:
+        async with TelegramClient(session, int(api_id), api_hash) as tg:
+            await setup_bot(
+                tg,
+                llm,
+                calendar,
+                dst="https://t.me/belgrade_aggregated",
+                src=(
+                    "https://t.me/m2Rb4gv9J8J5",
+                    "https://t.me/CaoBeograd",
+                    "https://t.me/Serbia",
+                    "https://t.me/SerbiaInMyMind",
+                    "https://t.me/adaptacija",
+                    "https://t.me/afisha_rs",
+                    "https://t.me/airsoft_serbia",
+                    "https://t.me/balkanoutdoor",
+                    "https://t.me/beogradske_vesti",
+                    "https://t.me/cofeek_vezde",
+                    "https://t.me/debaty_belgrad",
+                    "https://t.me/dobardabar_books",
+                    "https://t.me/go_tara",
+                    "https://t.me/ikonamitakikonami",
+                    "https://t.me/kikirikirs",
+                    "https://t.me/legiongamesrs",
+                    "https://t.me/lepopishem",
+                    "https://t.me/mapamagrus",
+                    "https://t.me/obitaniya_sreda",
+                    "https://t.me/poker_belgrade",
+                    "https://t.me/sta_imas_beograd",
+                    "https://t.me/standup_beo",
+                    "https://t.me/tech_illumination",
+                    "https://t.me/volna_srbjia",
+                    "https://t.me/vstrechi_v_belgrade",
+                    "https://t.me/zarko_tusic",
+                    "https://t.me/noda_space",
+                    "https://t.me/xecut_bg",
+                    "https://t.me/neka_beograd",
+                    "https://t.me/technoblok77",
+                ),
+                stages=stages,
+                prefilter=TemporalPrefilter(os.getenv("PREFILTER_MODE", "shadow")),
+                checkpoints=checkpoints,
+                backfill_limit=int(os.getenv("BACKFILL_LIMIT", "200")),
+                backfill_concurrency=int(os.getenv("BACKFILL_CONCURRENCY", "4")),
+                entity_cache=EntityCache(
+                    os.getenv("ENTITY_CACHE_PATH", "./data/entities.json")
+                ),
+                near_dups=near_dups,
+                compactor=compactor,
+                drain_timeout=float(os.getenv("DRAIN_TIMEOUT", "30")),
+            )
+    finally:
+        await llm.close()
+        await calendar.close()
+        checkpoints.close()
 
 
 if __name__ == "__main__":
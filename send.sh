@@ -1,97 +1,98 @@
 #!/bin/bash
 
 #./python/png_send.py assets/Unicorn/Color/unicorn_color.new.png
-./python/png_send.py assets/Wolf/Color/wolf_color.new.png
-./python/png_send.py assets/Snail/Color/snail_color.new.png
-./python/png_send.py assets/Cow\ face/Color/cow_face_color.new.png
-./python/png_send.py assets/Dog\ face/Color/dog_face_color.new.png
-./python/png_send.py assets/Crutch/Color/crutch_color.new.png
-./python/png_send.py assets/Rainbow\ flag/Color/rainbow_flag_color.new.png
-./python/png_send.py assets/Pirate\ flag/Color/pirate_flag_color.new.png
-./python/png_send.py assets/Biting\ lip/Color/biting_lip_color.new.png
-./python/png_send.py assets/Broken\ heart/Color/broken_heart_color.new.png
-./python/png_send.py assets/Heart\ on\ fire/Color/heart_on_fire_color.new.png
-./python/png_send.py assets/Handshake/Color/handshake_color.new.png
-./python/png_send.py assets/Clinking\ beer\ mugs/Color/clinking_beer_mugs_color.new.png
-./python/png_send.py assets/Clinking\ glasses/Color/clinking_glasses_color.new.png
-./python/png_send.py assets/Accordion/Color/accordion_color.new.png
-./python/png_send.py assets/Ambulance/Color/ambulance_color.new.png
-./python/png_send.py assets/Sports\ medal/Color/sports_medal_color.new.png
-./python/png_send.py assets/Radioactive/Color/radioactive_color.new.png
-./python/png_send.py assets/Collision/Color/collision_color.new.png
-./python/png_send.py assets/Party\ popper/Color/party_popper_color.new.png
-./python/png_send.py assets/No\ one\ under\ eighteen/Color/no_one_under_eighteen_color.new.png
-./python/png_send.py assets/Hole/Color/hole_color.new.png
-./python/png_send.py assets/Woman\ facepalming/Default/Color/woman_facepalming_color_default.new.png
-./python/png_send.py ./assets/Woman\ shrugging/Default/Color/woman_shrugging_color_default.new.png
-./python/png_send.py assets/Angry\ face/Color/angry_face_color.new.png
-./python/png_send.py assets/Angry\ face\ with\ horns/Color/angry_face_with_horns_color.new.png
-./python/png_send.py assets/Smiling\ face\ with\ horns/Color/smiling_face_with_horns_color.new.png
-./python/png_send.py assets/Anguished\ face/Color/anguished_face_color.new.png
-./python/png_send.py assets/Astonished\ face/Color/astonished_face_color.new.png
-./python/png_send.py assets/Beaming\ face\ with\ smiling\ eyes/Color/beaming_face_with_smiling_eyes_color.new.png
-./python/png_send.py assets/Clown\ face/Color/clown_face_color.new.png
-./python/png_send.py assets/Cold\ face/Color/cold_face_color.new.png
-./python/png_send.py assets/Confounded\ face/Color/confounded_face_color.new.png
-./python/png_send.py assets/Confused\ face/Color/confused_face_color.new.png
-./python/png_send.py assets/Disappointed\ face/Color/disappointed_face_color.new.png
-./python/png_send.py assets/Disguised\ face/Color/disguised_face_color.new.png
-./python/png_send.py assets/Downcast\ face\ with\ sweat/Color/downcast_face_with_sweat_color.new.png
-./python/png_send.py assets/Drooling\ face/Color/drooling_face_color.new.png
-./python/png_send.py assets/Exploding\ head/Color/exploding_head_color.new.png
-./python/png_send.py assets/Expressionless\ face/Color/expressionless_face_color.new.png
-./python/png_send.py assets/Face\ blowing\ a\ kiss/Color/face_blowing_a_kiss_color.new.png
-./python/png_send.py assets/Face\ holding\ back\ tears/Color/face_holding_back_tears_color.new.png
-./python/png_send.py assets/Face\ savoring\ food/Color/face_savoring_food_color.new.png
-./python/png_send.py assets/Face\ screaming\ in\ fear/Color/face_screaming_in_fear_color.new.png
-./python/png_send.py assets/Face\ vomiting/Color/face_vomiting_color.new.png
-./python/png_send.py assets/Face\ with\ hand\ over\ mouth/Color/face_with_hand_over_mouth_color.new.png
-./python/png_send.py assets/Face\ with\ monocle/Color/face_with_monocle_color.new.png
-./python/png_send.py assets/Face\ with\ peeking\ eye/Color/face_with_peeking_eye_color.new.png
-./python/png_send.py assets/Face\ with\ raised\ eyebrow/Color/face_with_raised_eyebrow_color.new.png
-./python/png_send.py assets/Face\ with\ rolling\ eyes/Color/face_with_rolling_eyes_color.new.png
-./python/png_send.py assets/Face\ with\ spiral\ eyes/Color/face_with_spiral_eyes_color.new.png
-./python/png_send.py assets/Face\ with\ tears\ of\ joy/Color/face_with_tears_of_joy_color.new.png
-./python/png_send.py assets/Face\ with\ tongue/Color/face_with_tongue_color.new.png
-./python/png_send.py assets/Fearful\ face/Color/fearful_face_color.new.png
-./python/png_send.py assets/Grinning\ face\ with\ big\ eyes/Color/grinning_face_with_big_eyes_color.new.png
-./python/png_send.py assets/Grinning\ squinting\ face/Color/grinning_squinting_face_color.new.png
-./python/png_send.py assets/Loudly\ crying\ face/Color/loudly_crying_face_color.new.png
-./python/png_send.py assets/Melting\ face/Color/melting_face_color.new.png
-./python/png_send.py assets/Money-mouth\ face/Color/money-mouth_face_color.new.png
-./python/png_send.py assets/Partying\ face/Color/partying_face_color.new.png
-./python/png_send.py assets/Pensive\ face/Color/pensive_face_color.new.png
-./python/png_send.py assets/Pleading\ face/Color/pleading_face_color.new.png
-./python/png_send.py assets/Pouting\ face/Color/pouting_face_color.new.png
-./python/png_send.py assets/Relieved\ face/Color/relieved_face_color.new.png
-./python/png_send.py assets/Rolling\ on\ the\ floor\ laughing/Color/rolling_on_the_floor_laughing_color.new.png
-./python/png_send.py assets/Sad\ but\ relieved\ face/Color/sad_but_relieved_face_color.new.png
-./python/png_send.py assets/Saluting\ face/Color/saluting_face_color.new.png
-./python/png_send.py assets/Shushing\ face/Color/shushing_face_color.new.png
-./python/png_send.py assets/Sleeping\ face/Color/sleeping_face_color.new.png
-./python/png_send.py assets/Slightly\ frowning\ face/Color/slightly_frowning_face_color.new.png
-./python/png_send.py assets/Slightly\ smiling\ face/Color/slightly_smiling_face_color.new.png
-./python/png_send.py assets/Smiling\ face/Color/smiling_face_color.new.png
-./python/png_send.py assets/Smiling\ face\ with\ halo/Color/smiling_face_with_halo_color.new.png
-./python/png_send.py assets/Smiling\ face\ with\ heart-eyes/Color/smiling_face_with_heart-eyes_color.new.png
-./python/png_send.py assets/Smiling\ face\ with\ hearts/Color/smiling_face_with_hearts_color.new.png
-./python/png_send.py assets/Smiling\ face\ with\ sunglasses/Color/smiling_face_with_sunglasses_color.new.png
-./python/png_send.py assets/Smiling\ face\ with\ tear/Color/smiling_face_with_tear_color.new.png
-./python/png_send.py assets/Smirking\ face/Color/smirking_face_color.new.png
-./python/png_send.py assets/Squinting\ face\ with\ tongue/Color/squinting_face_with_tongue_color.new.png
-./python/png_send.py assets/Star-struck/Color/star-struck_color.new.png
-./python/png_send.py assets/Thinking\ face/Color/thinking_face_color.new.png
-./python/png_send.py assets/Tired\ face/Color/tired_face_color.new.png
-./python/png_send.py assets/Unamused\ face/Color/unamused_face_color.new.png
-./python/png_send.py assets/Upside-down\ face/Color/upside-down_face_color.new.png
-./python/png_send.py assets/Weary\ face/Color/weary_face_color.new.png
-./python/png_send.py assets/Winking\ face\ with\ tongue/Color/winking_face_with_tongue_color.new.png
-./python/png_send.py assets/Woozy\ face/Color/woozy_face_color.new.png
-./python/png_send.py assets/Worried\ face/Color/worried_face_color.new.png
-./python/png_send.py assets/Yawning\ face/Color/yawning_face_color.new.png
-./python/png_send.py assets/Zany\ face/Color/zany_face_color.new.png
-./python/png_send.py assets/Zipper-mouth\ face/Color/zipper-mouth_face_color.new.png
-./python/png_send.py assets/See-no-evil\ monkey/Color/see-no-evil_monkey_color.new.png
-./python/png_send.py assets/Speak-no-evil\ monkey/Color/speak-no-evil_monkey_color.new.png
-./python/png_send.py assets/Hear-no-evil\ monkey/Color/hear-no-evil_monkey_color.new.png
-./python/png_send.py assets/Pile\ of\ poo/Color/pile_of_poo_color.new.png
+./python/png_send.py \
+    assets/Wolf/Color/wolf_color.new.png \
+    assets/Snail/Color/snail_color.new.png \
+    assets/Cow\ face/Color/cow_face_color.new.png \
+    assets/Dog\ face/Color/dog_face_color.new.png \
+    assets/Crutch/Color/crutch_color.new.png \
+    assets/Rainbow\ flag/Color/rainbow_flag_color.new.png \
+    assets/Pirate\ flag/Color/pirate_flag_color.new.png \
+    assets/Biting\ lip/Color/biting_lip_color.new.png \
+    assets/Broken\ heart/Color/broken_heart_color.new.png \
+    assets/Heart\ on\ fire/Color/heart_on_fire_color.new.png \
+    assets/Handshake/Color/handshake_color.new.png \
+    assets/Clinking\ beer\ mugs/Color/clinking_beer_mugs_color.new.png \
+    assets/Clinking\ glasses/Color/clinking_glasses_color.new.png \
+    assets/Accordion/Color/accordion_color.new.png \
+    assets/Ambulance/Color/ambulance_color.new.png \
+    assets/Sports\ medal/Color/sports_medal_color.new.png \
+    assets/Radioactive/Color/radioactive_color.new.png \
+    assets/Collision/Color/collision_color.new.png \
+    assets/Party\ popper/Color/party_popper_color.new.png \
+    assets/No\ one\ under\ eighteen/Color/no_one_under_eighteen_color.new.png \
+    assets/Hole/Color/hole_color.new.png \
+    assets/Woman\ facepalming/Default/Color/woman_facepalming_color_default.new.png \
+    ./assets/Woman\ shrugging/Default/Color/woman_shrugging_color_default.new.png \
+    assets/Angry\ face/Color/angry_face_color.new.png \
+    assets/Angry\ face\ with\ horns/Color/angry_face_with_horns_color.new.png \
+    assets/Smiling\ face\ with\ horns/Color/smiling_face_with_horns_color.new.png \
+    assets/Anguished\ face/Color/anguished_face_color.new.png \
+    assets/Astonished\ face/Color/astonished_face_color.new.png \
+    assets/Beaming\ face\ with\ smiling\ eyes/Color/beaming_face_with_smiling_eyes_color.new.png \
+    assets/Clown\ face/Color/clown_face_color.new.png \
+    assets/Cold\ face/Color/cold_face_color.new.png \
+    assets/Confounded\ face/Color/confounded_face_color.new.png \
+    assets/Confused\ face/Color/confused_face_color.new.png \
+    assets/Disappointed\ face/Color/disappointed_face_color.new.png \
+    assets/Disguised\ face/Color/disguised_face_color.new.png \
+    assets/Downcast\ face\ with\ sweat/Color/downcast_face_with_sweat_color.new.png \
+    assets/Drooling\ face/Color/drooling_face_color.new.png \
+    assets/Exploding\ head/Color/exploding_head_color.new.png \
+    assets/Expressionless\ face/Color/expressionless_face_color.new.png \
+    assets/Face\ blowing\ a\ kiss/Color/face_blowing_a_kiss_color.new.png \
+    assets/Face\ holding\ back\ tears/Color/face_holding_back_tears_color.new.png \
+    assets/Face\ savoring\ food/Color/face_savoring_food_color.new.png \
+    assets/Face\ screaming\ in\ fear/Color/face_screaming_in_fear_color.new.png \
+    assets/Face\ vomiting/Color/face_vomiting_color.new.png \
+    assets/Face\ with\ hand\ over\ mouth/Color/face_with_hand_over_mouth_color.new.png \
+    assets/Face\ with\ monocle/Color/face_with_monocle_color.new.png \
+    assets/Face\ with\ peeking\ eye/Color/face_with_peeking_eye_color.new.png \
+    assets/Face\ with\ raised\ eyebrow/Color/face_with_raised_eyebrow_color.new.png \
+    assets/Face\ with\ rolling\ eyes/Color/face_with_rolling_eyes_color.new.png \
+    assets/Face\ with\ spiral\ eyes/Color/face_with_spiral_eyes_color.new.png \
+    assets/Face\ with\ tears\ of\ joy/Color/face_with_tears_of_joy_color.new.png \
+    assets/Face\ with\ tongue/Color/face_with_tongue_color.new.png \
+    assets/Fearful\ face/Color/fearful_face_color.new.png \
+    assets/Grinning\ face\ with\ big\ eyes/Color/grinning_face_with_big_eyes_color.new.png \
+    assets/Grinning\ squinting\ face/Color/grinning_squinting_face_color.new.png \
+    assets/Loudly\ crying\ face/Color/loudly_crying_face_color.new.png \
+    assets/Melting\ face/Color/melting_face_color.new.png \
+    assets/Money-mouth\ face/Color/money-mouth_face_color.new.png \
+    assets/Partying\ face/Color/partying_face_color.new.png \
+    assets/Pensive\ face/Color/pensive_face_color.new.png \
+    assets/Pleading\ face/Color/pleading_face_color.new.png \
+    assets/Pouting\ face/Color/pouting_face_color.new.png \
+    assets/Relieved\ face/Color/relieved_face_color.new.png \
+    assets/Rolling\ on\ the\ floor\ laughing/Color/rolling_on_the_floor_laughing_color.new.png \
+    assets/Sad\ but\ relieved\ face/Color/sad_but_relieved_face_color.new.png \
+    assets/Saluting\ face/Color/saluting_face_color.new.png \
+    assets/Shushing\ face/Color/shushing_face_color.new.png \
+    assets/Sleeping\ face/Color/sleeping_face_color.new.png \
+    assets/Slightly\ frowning\ face/Color/slightly_frowning_face_color.new.png \
+    assets/Slightly\ smiling\ face/Color/slightly_smiling_face_color.new.png \
+    assets/Smiling\ face/Color/smiling_face_color.new.png \
+    assets/Smiling\ face\ with\ halo/Color/smiling_face_with_halo_color.new.png \
+    assets/Smiling\ face\ with\ heart-eyes/Color/smiling_face_with_heart-eyes_color.new.png \
+    assets/Smiling\ face\ with\ hearts/Color/smiling_face_with_hearts_color.new.png \
+    assets/Smiling\ face\ with\ sunglasses/Color/smiling_face_with_sunglasses_color.new.png \
+    assets/Smiling\ face\ with\ tear/Color/smiling_face_with_tear_color.new.png \
+    assets/Smirking\ face/Color/smirking_face_color.new.png \
+    assets/Squinting\ face\ with\ tongue/Color/squinting_face_with_tongue_color.new.png \
+    assets/Star-struck/Color/star-struck_color.new.png \
+    assets/Thinking\ face/Color/thinking_face_color.new.png \
+    assets/Tired\ face/Color/tired_face_color.new.png \
+    assets/Unamused\ face/Color/unamused_face_color.new.png \
+    assets/Upside-down\ face/Color/upside-down_face_color.new.png \
+    assets/Weary\ face/Color/weary_face_color.new.png \
+    assets/Winking\ face\ with\ tongue/Color/winking_face_with_tongue_color.new.png \
+    assets/Woozy\ face/Color/woozy_face_color.new.png \
+    assets/Worried\ face/Color/worried_face_color.new.png \
+    assets/Yawning\ face/Color/yawning_face_color.new.png \
+    assets/Zany\ face/Color/zany_face_color.new.png \
+    assets/Zipper-mouth\ face/Color/zipper-mouth_face_color.new.png \
+    assets/See-no-evil\ monkey/Color/see-no-evil_monkey_color.new.png \
+    assets/Speak-no-evil\ monkey/Color/speak-no-evil_monkey_color.new.png \
+    assets/Hear-no-evil\ monkey/Color/hear-no-evil_monkey_color.new.png \
+    assets/Pile\ of\ poo/Color/pile_of_poo_color.new.png
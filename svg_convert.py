@@ -1,21 +1,31 @@
 #!/usr/bin/env python
 
+import io
 import os
 import sys
 
 from cairosvg import svg2png
+from PIL import Image
 
-for infile in sys.argv[1:]:
-    file, ext = os.path.splitext(infile)
+import png_encode
+
+
+def convert(infile: str) -> bytes:
     with open(infile) as f:
+        return svg2png(
+            file_obj=f,
+            output_height=512,
+            output_width=512,
+            dpi=300,
+            scale=2,
+        )
+
+
+if __name__ == "__main__":
+    for infile in sys.argv[1:]:
+        file, ext = os.path.splitext(infile)
         try:
-            svg2png(
-                file_obj=f,
-                write_to=file + ".new.png",
-                output_height=512,
-                output_width=512,
-                dpi=300,
-                scale=2,
-            )
+            with Image.open(io.BytesIO(convert(infile))) as im:
+                png_encode.save(im, file + ".new.png")
         except Exception as e:
             print(infile, e)
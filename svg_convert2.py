@@ -1,21 +1,31 @@
 #!/usr/bin/env python
 
+import io
 import os
 import sys
 
+from PIL import Image
 from reportlab.graphics import renderPM
 from svglib.svglib import svg2rlg
 
-for infile in sys.argv[1:]:
-    file, ext = os.path.splitext(infile)
-    try:
-        drawing = svg2rlg(infile)
-        renderPM.drawToFile(
-            drawing,
-            file + ".new.png",
-            fmt="PNG",
-            dpi=300,
-            bg=None,
-        )
-    except Exception as e:
-        print(infile, e)
+import png_encode
+
+
+def convert(infile: str) -> bytes:
+    drawing = svg2rlg(infile)
+    return renderPM.drawToString(
+        drawing,
+        fmt="PNG",
+        dpi=300,
+        bg=None,
+    )
+
+
+if __name__ == "__main__":
+    for infile in sys.argv[1:]:
+        file, ext = os.path.splitext(infile)
+        try:
+            with Image.open(io.BytesIO(convert(infile))) as im:
+                png_encode.save(im, file + ".new.png")
+        except Exception as e:
+            print(infile, e)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Render SVGs straight to 512px sticker PNGs in memory, encoding once.
+
+Fuses svg_convert/svg_convert2 -> png_resize -> png_filter: the SVG is drawn
+at the target size, filtered on the same buffer and encoded once by png_encode.
+"""
+
+import argparse
+import os
+
+from PIL import Image
+
+import png_encode
+import png_filter
+
+SIZE = 512
+BACKENDS = ("cairosvg", "svglib")
+
+
+def render_cairosvg(infile: str, size: int = SIZE) -> Image.Image:
+    from cairosvg.parser import Tree
+    from cairosvg.surface import PNGSurface
+
+    # No output target: the surface is drawn in memory and never PNG-encoded.
+    surface = PNGSurface(
+        Tree(url=infile), None, dpi=300, output_width=size, output_height=size
+    )
+    image = surface.cairo
+    image.flush()
+    # Cairo's ARGB32 is premultiplied and native-endian, i.e. BGRa bytes here.
+    return Image.frombuffer(
+        "RGBA",
+        (image.get_width(), image.get_height()),
+        bytes(image.get_data()),
+        "raw",
+        "BGRa",
+        image.get_stride(),
+        1,
+    )
+
+
+def render_svglib(infile: str, size: int = SIZE) -> Image.Image:
+    from reportlab.graphics import renderPM
+    from svglib.svglib import svg2rlg
+
+    drawing = svg2rlg(infile)
+    if drawing is None:
+        raise ValueError("not a valid SVG")
+    drawing.renderScale = size / max(drawing.width, drawing.height)
+    return renderPM.drawToPIL(drawing, dpi=72, bg=None, backendFmt="ARGB32")
+
+
+RENDERERS = {"cairosvg": render_cairosvg, "svglib": render_svglib}
+
+
+def fit(im: Image.Image, size: int = SIZE) -> Image.Image:
+    if max(im.size) > size:
+        im.thumbnail((size, size))
+    return im
+
+
+def render(
+    infile: str, backend: str = "cairosvg", size: int = SIZE, sharpen: bool = True
+) -> Image.Image:
+    im = fit(RENDERERS[backend](infile, size), size)
+    return png_filter.sharpen(im) if sharpen else im
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--backend", default="cairosvg", choices=BACKENDS)
+    parser.add_argument("--no-filter", dest="sharpen", action="store_false")
+    args = parser.parse_args()
+    for infile in args.files:
+        file, ext = os.path.splitext(infile)
+        try:
+            im = render(infile, args.backend, sharpen=args.sharpen)
+            png_encode.save(im, file + ".new.png")
+        except Exception as e:
+            print(infile, e)